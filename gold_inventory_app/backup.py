@@ -0,0 +1,306 @@
+"""
+온라인 백업 / 복원
+
+sqlite3.Connection.backup 으로 페이지 단위로 나눠 복사하므로 앱을 끄지 않아도 되고,
+백그라운드 스레드에서 돌리면 GUI 가 멈추지 않는다.
+
+    backups/
+      snapshots/gold_data-20240101-120000.db(.gz)   DB 스냅숏
+      snapshots/gold_data-20240101-120000.json      매니페스트 (이미지 경로 → 해시)
+      images/ab/ab12...ef.jpg                       이미지 (내용 해시 기준, 한 번만 저장)
+      images/index.json                             (경로, 크기, 수정시각) → 해시 캐시
+
+DB 는 스냅숏마다 통째로 복사하지만 이미지는 해시가 같으면 다시 복사하지 않는다.
+
+    mgr = BackupManager("gold_data.db", "backups", keep=24, compress=True)
+    mgr.start_backup(on_done=print)       # 백그라운드 1회
+    mgr.schedule(3600)                    # 1시간마다
+    mgr.restore(mgr.list_snapshots()[-1], "gold_data.db")
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+PAGES_PER_STEP = 256        # backup 한 단계에서 복사할 페이지 수
+STEP_PAUSE = 0.005          # 단계 사이 쉬는 시간 (초) — 다른 연결에 잠금을 양보
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupManager:
+    def __init__(self, db_path: str | Path, backup_dir: str | Path, keep: int = 10,
+                 compress: bool = False, include_images: bool = True):
+        self.db_path = Path(db_path)
+        self.backup_dir = Path(backup_dir)
+        self.snap_dir = self.backup_dir / "snapshots"
+        self.image_dir = self.backup_dir / "images"
+        self.keep = keep
+        self.compress = compress
+        self.include_images = include_images
+        self._lock = threading.Lock()          # 동시에 두 번 백업하지 않도록
+        self._stop = threading.Event()
+        self._scheduler: threading.Thread | None = None
+
+    # ─── backup ───────────────────────────────
+    def backup_now(self, progress: Callable[[int, int], None] | None = None) -> Path:
+        """
+        스냅숏 1개를 만들고 보존 개수를 넘는 오래된 스냅숏을 정리한다.
+        progress(remaining_pages, total_pages) 는 각 단계마다 호출된다.
+        반환: 스냅숏 DB 파일 경로
+        """
+        with self._lock:
+            self.snap_dir.mkdir(parents=True, exist_ok=True)
+            stem = f"{self.db_path.stem}-{datetime.now():%Y%m%d-%H%M%S}"
+            while (self.snap_dir / f"{stem}.json").exists():   # 같은 초에 두 번
+                time.sleep(1)
+                stem = f"{self.db_path.stem}-{datetime.now():%Y%m%d-%H%M%S}"
+
+            tmp_db = self.snap_dir / f".{stem}.db.partial"
+            try:
+                self._copy_db(tmp_db, progress)
+                images = self._store_images(tmp_db) if self.include_images else {}
+                if self.compress:
+                    target = self.snap_dir / f"{stem}.db.gz"
+                    with open(tmp_db, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+                    tmp_db.unlink()
+                else:
+                    target = self.snap_dir / f"{stem}.db"
+                    os.replace(tmp_db, target)
+            finally:
+                if tmp_db.exists():
+                    tmp_db.unlink()
+
+            manifest = {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "source": str(self.db_path.resolve()),
+                "snapshot": target.name,
+                "images": images,
+            }
+            _write_json(self.snap_dir / f"{stem}.json", manifest)
+            self.rotate()
+            return target
+
+    def _copy_db(self, dest: Path, progress):
+        src = sqlite3.connect(self.db_path)
+        dst = sqlite3.connect(dest)
+        try:
+            def _step(status, remaining, total):
+                if progress:
+                    progress(remaining, total)
+                if STEP_PAUSE:
+                    time.sleep(STEP_PAUSE)
+            src.backup(dst, pages=PAGES_PER_STEP, progress=_step)
+        finally:
+            dst.close()
+            src.close()
+
+    def start_backup(self, on_done: Callable[[Path], None] | None = None,
+                     on_error: Callable[[Exception], None] | None = None,
+                     progress: Callable[[int, int], None] | None = None) -> threading.Thread:
+        """backup_now 를 백그라운드 스레드에서 실행 (콜백도 그 스레드에서 호출됨)"""
+        def _run():
+            try:
+                path = self.backup_now(progress)
+            except Exception as e:          # noqa: BLE001 — 호출 측 콜백으로 전달
+                if on_error:
+                    on_error(e)
+                return
+            if on_done:
+                on_done(path)
+        t = threading.Thread(target=_run, name="gold-backup", daemon=True)
+        t.start()
+        return t
+
+    def schedule(self, interval_s: float, on_error: Callable[[Exception], None] | None = None):
+        """interval_s 초마다 스냅숏 (stop_schedule 로 중지)"""
+        self.stop_schedule()
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval_s):
+                try:
+                    self.backup_now()
+                except Exception as e:      # noqa: BLE001 — 다음 주기에 재시도
+                    if on_error:
+                        on_error(e)
+        self._scheduler = threading.Thread(target=_loop, name="gold-backup-schedule", daemon=True)
+        self._scheduler.start()
+
+    def stop_schedule(self):
+        if self._scheduler is not None:
+            self._stop.set()
+            self._scheduler.join()
+            self._scheduler = None
+
+    # ─── images ───────────────────────────────
+    def _store_images(self, snapshot_db: Path) -> Dict[str, str]:
+        """스냅숏이 참조하는 이미지를 해시 기준으로 저장. 반환: {원본 경로: 해시 파일명}"""
+        conn = sqlite3.connect(snapshot_db)
+        try:
+            paths = {r[0] for r in conn.execute(
+                "SELECT image_path FROM products WHERE image_path <> '' "
+                "UNION SELECT path FROM product_images WHERE path <> ''")}
+        finally:
+            conn.close()
+
+        self.image_dir.mkdir(parents=True, exist_ok=True)
+        index_path = self.image_dir / "index.json"
+        index = _read_json(index_path, {})
+        stored = {}
+        for path in sorted(paths):
+            p = Path(path)
+            try:
+                st = p.stat()
+            except OSError:
+                continue                    # 원본이 없어진 이미지는 건너뜀
+            key = f"{p.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+            blob_name = index.get(key)
+            if blob_name is None or not self._blob_path(blob_name).exists():
+                blob_name = _sha256(p) + p.suffix.lower()
+                blob = self._blob_path(blob_name)
+                if not blob.exists():
+                    blob.parent.mkdir(exist_ok=True)
+                    tmp = blob.with_suffix(blob.suffix + ".partial")
+                    shutil.copyfile(p, tmp)
+                    os.replace(tmp, blob)
+                index[key] = blob_name
+            stored[path] = blob_name
+        _write_json(index_path, index)
+        return stored
+
+    def _blob_path(self, blob_name: str) -> Path:
+        return self.image_dir / blob_name[:2] / blob_name
+
+    # ─── retention ────────────────────────────
+    def list_snapshots(self) -> List[Path]:
+        """오래된 순으로 정렬된 스냅숏 DB 파일 목록"""
+        if not self.snap_dir.exists():
+            return []
+        snaps = []
+        for m in sorted(self.snap_dir.glob("*.json")):
+            name = _read_json(m, {}).get("snapshot")
+            if name and (self.snap_dir / name).is_file():
+                snaps.append(self.snap_dir / name)
+        return snaps
+
+    def rotate(self) -> List[Path]:
+        """keep 개수를 넘는 오래된 스냅숏과 더 이상 참조되지 않는 이미지 삭제"""
+        removed = []
+        manifests = sorted(self.snap_dir.glob("*.json"))
+        for m in manifests[:max(0, len(manifests) - self.keep)]:
+            name = _read_json(m, {}).get("snapshot")
+            if name and (self.snap_dir / name).is_file():
+                (self.snap_dir / name).unlink()
+                removed.append(self.snap_dir / name)
+            m.unlink()
+
+        if removed and self.image_dir.exists():
+            live = set()
+            for m in self.snap_dir.glob("*.json"):
+                live.update(_read_json(m, {}).get("images", {}).values())
+            for blob in self.image_dir.glob("*/*"):
+                if blob.is_file() and blob.name not in live:
+                    blob.unlink()
+            index_path = self.image_dir / "index.json"
+            index = {k: v for k, v in _read_json(index_path, {}).items() if v in live}
+            _write_json(index_path, index)
+        return removed
+
+    # ─── restore ──────────────────────────────
+    def restore(self, snapshot: str | Path, target_db: str | Path | None = None,
+                restore_images: bool = False) -> Path:
+        """
+        스냅숏 무결성을 확인한 뒤 target_db(기본: 원래 DB)로 되돌린다.
+        restore_images=True 면 원래 경로에 없어진 이미지도 되살린다.
+        """
+        snapshot = Path(snapshot)
+        target_db = Path(target_db) if target_db else self.db_path
+        # 대상 DB 가 깨져 있어도 되도록 옆의 임시 파일로 복원·검사한 뒤 바꿔 끼움
+        staging = target_db.with_name(target_db.name + ".restoring")
+        staging.unlink(missing_ok=True)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                plain = snapshot
+                if snapshot.suffix == ".gz":
+                    plain = Path(tmp) / snapshot.stem
+                    with gzip.open(snapshot, "rb") as src, open(plain, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+                src = sqlite3.connect(f"{plain.resolve().as_uri()}?mode=ro", uri=True)
+                try:
+                    result = [r[0] for r in src.execute("PRAGMA integrity_check")]
+                    if result != ["ok"]:
+                        raise BackupError(f"스냅숏 무결성 검사 실패: {snapshot}: {result[:5]}")
+                    dst = sqlite3.connect(staging)
+                    try:
+                        src.backup(dst, pages=PAGES_PER_STEP)
+                        result = [r[0] for r in dst.execute("PRAGMA integrity_check")]
+                    finally:
+                        dst.close()
+                finally:
+                    src.close()
+        except (sqlite3.DatabaseError, gzip.BadGzipFile, zlib.error, EOFError) as e:
+            staging.unlink(missing_ok=True)
+            raise BackupError(f"스냅숏을 읽을 수 없습니다: {snapshot}: {e}") from e
+        except BaseException:
+            staging.unlink(missing_ok=True)
+            raise
+        if result != ["ok"]:
+            staging.unlink(missing_ok=True)
+            raise BackupError(f"복원된 DB 무결성 검사 실패: {target_db}: {result[:5]}")
+        # 예전 DB 의 WAL 이 새 DB 에 적용되지 않도록 함께 지움
+        for suffix in ("-wal", "-shm", "-journal"):
+            Path(f"{target_db}{suffix}").unlink(missing_ok=True)
+        os.replace(staging, target_db)
+
+        if restore_images:
+            manifest = _read_json(self._manifest_for(snapshot), {})
+            for orig, blob_name in manifest.get("images", {}).items():
+                blob = self._blob_path(blob_name)
+                if not Path(orig).exists() and blob.exists():
+                    Path(orig).parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(blob, orig)
+        return target_db
+
+    def _manifest_for(self, snapshot: Path) -> Path:
+        name = snapshot.name
+        for suffix in (".gz", ".db"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        return snapshot.parent / f"{name}.json"
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_json(path: Path, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path: Path, obj):
+    tmp = path.with_suffix(path.suffix + ".partial")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
@@ -0,0 +1,468 @@
+"""
+Qt 없이 쓰는 커맨드라인 도구 (야간 배치 / 백오피스 스크립트용)
+
+    python -m gold_inventory_app.cli search --karat 18K --category R
+    python -m gold_inventory_app.cli search --karat 18K -f weight_g__between=3,5 -f stock_qty__gt=0
+    python -m gold_inventory_app.cli get 12
+    python -m gold_inventory_app.cli code 8801234567890
+    python -m gold_inventory_app.cli set S-101
+    python -m gold_inventory_app.cli sets
+    python -m gold_inventory_app.cli favorite 3 4 5
+    python -m gold_inventory_app.cli discontinue --off 7
+    python -m gold_inventory_app.cli vacuum
+    python -m gold_inventory_app.cli check
+    python -m gold_inventory_app.cli stats
+    python -m gold_inventory_app.cli sync-export --peer 강남점 out.delta
+    python -m gold_inventory_app.cli sync-import in.delta
+    python -m gold_inventory_app.cli backup --dir backups --compress --keep 24
+    python -m gold_inventory_app.cli dupes --workers 4 --json dupes.json
+    python -m gold_inventory_app.cli merge 120 121 340
+    python -m gold_inventory_app.cli search --format json > all.jsonl
+    python -m gold_inventory_app.cli import all.jsonl
+    python -m gold_inventory_app.cli prices-load gold_2024.csv --don
+    python -m gold_inventory_app.cli valuation --from 2024-01-01 --to 2024-12-31
+    python -m gold_inventory_app.cli restore backups/snapshots/gold_data-20240101-120000.db.gz
+
+PyQt5 를 import 하지 않으므로 디스플레이 없이 동작한다.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, fields
+from datetime import date
+from typing import Iterable, List
+
+from . import sync
+from .backup import BackupError, BackupManager
+from .db import SORT_COLUMNS, DataManager
+from .models import Product
+
+# search_products 의 개별 필터와 동일한 키
+FILTER_KEYS = ("category", "name", "supplier_name", "supplier_item_no",
+               "product_code", "set_no", "karat", "discontinued", "is_favorite")
+
+TSV_COLUMNS = ("id", "category", "name", "supplier_name", "supplier_item_no",
+               "product_code", "karat", "weight_g", "size", "total_qb_qty",
+               "labor_cost1", "labor_cost2", "set_no", "discontinued",
+               "stock_qty", "is_favorite")
+
+
+def _emit_products(products: Iterable[Product], fmt: str, out=sys.stdout) -> int:
+    """한 건씩 바로 출력 (전체 결과를 메모리에 모으지 않음)"""
+    n = 0
+    if fmt == "tsv":
+        out.write("\t".join(TSV_COLUMNS) + "\n")
+    for p in products:
+        if fmt == "json":
+            out.write(json.dumps(asdict(p), ensure_ascii=False) + "\n")
+        else:
+            d = asdict(p)
+            out.write("\t".join(_tsv_cell(d[c]) for c in TSV_COLUMNS) + "\n")
+        n += 1
+    out.flush()
+    return n
+
+
+def _tsv_cell(val) -> str:
+    if isinstance(val, bool):
+        return "Y" if val else "N"
+    if val is None:
+        return ""
+    return str(val).replace("\t", " ").replace("\n", " ")
+
+
+def _parse_filter(text: str):
+    key, sep, val = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"KEY=VALUE 형식이어야 합니다: {text!r}")
+    return key.strip(), val
+
+
+def cmd_search(dm: DataManager, args) -> int:
+    filters = {k: getattr(args, k) for k in FILTER_KEYS if getattr(args, k)}
+    for key, val in args.filter or []:
+        filters[key] = val
+    order_by = (args.sort, "desc" if args.desc else "asc") if args.sort else None
+    _emit_products(dm.iter_products(filters, args.any or "", order_by=order_by), args.format)
+    return 0
+
+
+def cmd_get(dm: DataManager, args) -> int:
+    missing = 0
+    found: List[Product] = []
+    for pid in args.ids:
+        p = dm.get_product(pid)
+        if p is None:
+            print(f"상품 없음: {pid}", file=sys.stderr)
+            missing += 1
+        else:
+            found.append(p)
+    _emit_products(found, args.format)
+    return 1 if missing else 0
+
+
+def cmd_code(dm: DataManager, args) -> int:
+    missing = 0
+    found: List[Product] = []
+    for code in args.codes:
+        p = dm.get_by_code(code)
+        if p is None:
+            print(f"상품번호 없음: {code}", file=sys.stderr)
+            missing += 1
+        else:
+            found.append(p)
+    _emit_products(found, args.format)
+    return 1 if missing else 0
+
+
+def cmd_set(dm: DataManager, args) -> int:
+    summary = dm.set_summary(args.set_no)
+    if summary is None:
+        print(f"세트 없음: {args.set_no}", file=sys.stderr)
+        return 1
+    _emit_products(dm.get_set_members(args.set_no), args.format)
+    print(f"# 구성 {summary.members}개, 총중량 {summary.total_weight_g:g}g, "
+          f"총공임 {summary.total_labor:,.0f}, 판매 가능 세트 {summary.complete_sets}",
+          file=sys.stderr)
+    return 0
+
+
+def cmd_sets(dm: DataManager, args) -> int:
+    print("set_no\tmembers\ttotal_weight_g\ttotal_labor\tcomplete_sets")
+    for s in dm.list_sets(args.match or ""):
+        print(f"{_tsv_cell(s.set_no)}\t{s.members}\t{s.total_weight_g:g}\t"
+              f"{s.total_labor:g}\t{s.complete_sets}")
+    return 0
+
+
+def cmd_favorite(dm: DataManager, args) -> int:
+    n = dm.set_favorite(_ids(args), not args.off)
+    print(f"{n}건 변경")
+    return 0
+
+
+def cmd_discontinue(dm: DataManager, args) -> int:
+    n = dm.set_discontinued(_ids(args), not args.off)
+    print(f"{n}건 변경")
+    return 0
+
+
+def _ids(args) -> List[int]:
+    ids = list(args.ids)
+    if args.stdin:
+        ids.extend(int(line) for line in sys.stdin if line.strip())
+    return ids
+
+
+def cmd_vacuum(dm: DataManager, args) -> int:
+    dm.vacuum()
+    print("VACUUM 완료")
+    return 0
+
+
+def cmd_analyze(dm: DataManager, args) -> int:
+    dm.analyze()
+    print("ANALYZE 완료")
+    return 0
+
+
+def cmd_check(dm: DataManager, args) -> int:
+    problems = dm.integrity_check()
+    for line in problems:
+        print(line)
+    return 0 if problems == ["ok"] else 1
+
+
+def cmd_stats(dm: DataManager, args) -> int:
+    print(json.dumps(dm.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_sync_export(dm: DataManager, args) -> int:
+    info = sync.export_delta(dm.conn, args.path, peer=args.peer, since=args.since)
+    print(f"{info['rows']}건 내보냄 (seq {info['from_seq']} → {info['to_seq']}, "
+          f"매장 {sync.store_id(dm.conn)})")
+    return 0
+
+
+def cmd_sync_import(dm: DataManager, args) -> int:
+    for path in args.paths:
+        r = sync.import_delta(dm.conn, path)
+        print(f"{path}: 추가 {r['inserted']} / 수정 {r['updated']} / "
+              f"삭제 {r['deleted']} / 건너뜀 {r['skipped']}")
+        if r["code_conflicts"]:
+            print(f"  상품번호 중복으로 반영하지 않은 상품번호 {r['code_conflicts']}건", file=sys.stderr)
+    return 0
+
+
+def cmd_dupes(dm: DataManager, args) -> int:
+    from . import dedup             # 배치 작업 전용 (Pillow 확인 포함)
+    groups = dedup.find_duplicates(dm.conn, threshold=args.threshold or dedup.NAME_THRESHOLD,
+                                   images=args.images, workers=args.workers)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([{"ids": g.ids, "pairs": g.pairs} for g in groups], f,
+                      ensure_ascii=False, indent=1)
+    names = {}
+    for g in groups[:args.show]:
+        for pid in g.ids:
+            if pid not in names:
+                p = dm.get_product(pid)
+                names[pid] = f"#{pid} {p.name} / {p.supplier_name or '-'} {p.supplier_item_no or ''}".rstrip()
+        print(f"[{len(g.ids)}개, 유사도 {g.best_score:.2f}]  merge {' '.join(map(str, g.ids))}")
+        for pid in g.ids:
+            print(f"    {names[pid]}")
+        for a, b, score, reason in g.pairs:
+            print(f"      {a} ~ {b}  {score:.2f}  {reason}")
+    print(f"후보 그룹 {len(groups)}개 (상품 {sum(len(g.ids) for g in groups)}개)", file=sys.stderr)
+    return 0
+
+
+def cmd_merge(dm: DataManager, args) -> int:
+    p = dm.merge_products(args.keep, args.ids)
+    print(f"#{p.id} {p.name} 로 {len(args.ids)}건 병합 (재고 {p.stock_qty})")
+    return 0
+
+
+def cmd_import(dm: DataManager, args) -> int:
+    """search/get --format json 출력(JSON Lines)을 상품번호 기준으로 입력/갱신"""
+    names = {f.name for f in fields(Product)} - {"created_at", "updated_at"}
+
+    def products():
+        for path in args.paths:
+            with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as f:
+                for lineno, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"{path}:{lineno}: JSON 오류: {e.msg}") from None
+                    yield Product(**{k: v for k, v in rec.items() if k in names})
+
+    t0 = time.perf_counter()
+    r = dm.upsert_products(products(), match_id=args.match_id)
+    print(f"추가 {r['inserted']}, 갱신 {r['updated']}, 변경 없음 {r['unchanged']}, "
+          f"건너뜀 {r['skipped']} ({time.perf_counter() - t0:.1f}초)", file=sys.stderr)
+    if r["skipped"] and not args.match_id:
+        print("# 상품번호가 없는 행은 건너뜀 (같은 DB 에서 내보낸 목록이면 --match-id)", file=sys.stderr)
+    return 0
+
+
+def cmd_prices_load(dm: DataManager, args) -> int:
+    from . import prices            # numpy 는 시세 명령에서만 불러옴
+    total = 0
+    for path in args.paths:
+        n = prices.load_csv(dm.conn, path, unit="don" if args.don else "g")
+        print(f"{path}: {n}건")
+        total += n
+    return 0 if total else 1
+
+
+def cmd_prices(dm: DataManager, args) -> int:
+    from . import prices
+    print("day\tprice_per_g")
+    for day, price in prices.get_prices(dm.conn, args.start, args.end):
+        print(f"{day}\t{price:g}")
+    return 0
+
+
+def cmd_valuation(dm: DataManager, args) -> int:
+    from . import prices
+    v = prices.daily_valuation(dm.conn, args.start, args.end)
+    cols = ("day", "price_per_g", "fine_g", "value")
+    if args.format == "tsv":
+        print("\t".join(cols))
+    for i in range(len(v["day"])):
+        row = {"day": str(v["day"][i])}
+        for c in cols[1:]:
+            x = float(v[c][i])
+            row[c] = None if x != x else round(x, 4)          # NaN → 시세 없음
+        if args.format == "json":
+            print(json.dumps(row))
+        else:
+            print("\t".join(_tsv_cell(row[c]) for c in cols))
+    return 0
+
+
+def _backup_manager(args) -> BackupManager:
+    return BackupManager(args.db, args.dir, keep=getattr(args, "keep", 10),
+                         compress=getattr(args, "compress", False),
+                         include_images=not getattr(args, "no_images", False))
+
+
+def cmd_backup(dm: DataManager, args) -> int:
+    mgr = _backup_manager(args)
+    path = mgr.backup_now()
+    print(f"백업 완료: {path}")
+    if args.every:
+        print(f"{args.every}분마다 백업 (Ctrl+C 로 종료)")
+        mgr.schedule(args.every * 60, on_error=lambda e: print(f"백업 실패: {e}", file=sys.stderr))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            mgr.stop_schedule()
+    return 0
+
+
+def cmd_backups(dm: DataManager, args) -> int:
+    for path in _backup_manager(args).list_snapshots():
+        print(path)
+    return 0
+
+
+def cmd_restore(dm: DataManager, args) -> int:
+    target = _backup_manager(args).restore(args.snapshot, args.to or args.db,
+                                           restore_images=args.images)
+    print(f"복원 완료: {target}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gold_inventory_app.cli",
+                                     description="GOLD MANAGER 커맨드라인 도구")
+    parser.add_argument("--db", default="gold_data.db", help="DB 파일 경로 (기본: gold_data.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("search", help="상품 검색 (search_products 와 같은 필터)")
+    for key in FILTER_KEYS:
+        p.add_argument(f"--{key.replace('_', '-')}", dest=key)
+    p.add_argument("--any", help="주요 컬럼 전체 OR 검색")
+    p.add_argument("-f", "--filter", action="append", type=_parse_filter,
+                   metavar="KEY=VALUE",
+                   help="추가 필터, 여러 번 지정 가능. 예: weight_g__between=3,5  "
+                        "stock_qty__gt=0  category__in=R,N  labor_cost1__lte=50000")
+    p.add_argument("--sort", choices=SORT_COLUMNS, help="정렬 컬럼 (기본: 즐겨찾기 우선, 최신순)")
+    p.add_argument("--desc", action="store_true", help="내림차순 정렬")
+    p.add_argument("--format", choices=("tsv", "json"), default="tsv")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("get", help="ID로 상품 조회")
+    p.add_argument("ids", nargs="+", type=int)
+    p.add_argument("--format", choices=("tsv", "json"), default="json")
+    p.set_defaults(func=cmd_get)
+
+    p = sub.add_parser("code", help="상품번호(바코드)로 정확히 일치하는 상품 조회")
+    p.add_argument("codes", nargs="+")
+    p.add_argument("--format", choices=("tsv", "json"), default="json")
+    p.set_defaults(func=cmd_code)
+
+    p = sub.add_parser("set", help="세트 구성 상품과 집계 (집계는 표준오류로 출력)")
+    p.add_argument("set_no")
+    p.add_argument("--format", choices=("tsv", "json"), default="tsv")
+    p.set_defaults(func=cmd_set)
+
+    p = sub.add_parser("sets", help="세트 목록과 집계 (총중량, 총공임, 판매 가능 세트 수)")
+    p.add_argument("--match", help="세트번호에 포함된 문자열")
+    p.set_defaults(func=cmd_sets)
+
+    for name, func, help_ in (("favorite", cmd_favorite, "즐겨찾기 일괄 지정"),
+                              ("discontinue", cmd_discontinue, "단종 일괄 지정")):
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("ids", nargs="*", type=int)
+        p.add_argument("--stdin", action="store_true", help="표준입력에서 ID를 한 줄씩 읽음")
+        p.add_argument("--off", action="store_true", help="지정 대신 해제")
+        p.set_defaults(func=func)
+
+    sub.add_parser("vacuum", help="VACUUM 실행").set_defaults(func=cmd_vacuum)
+    sub.add_parser("analyze", help="ANALYZE 실행").set_defaults(func=cmd_analyze)
+    sub.add_parser("check", help="PRAGMA integrity_check").set_defaults(func=cmd_check)
+    sub.add_parser("stats", help="재고 통계").set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("sync-export", help="다른 매장으로 보낼 델타 파일 생성")
+    p.add_argument("path")
+    p.add_argument("--peer", help="받는 매장 이름 (마지막으로 보낸 위치부터 이어서 내보냄)")
+    p.add_argument("--since", type=int, help="이 변경 번호(seq) 이후만 내보냄")
+    p.set_defaults(func=cmd_sync_export)
+
+    p = sub.add_parser("backup", help="온라인 백업 스냅숏 생성")
+    p.add_argument("--dir", default="backups", help="백업 폴더 (기본: backups)")
+    p.add_argument("--keep", type=int, default=10, help="보존할 스냅숏 수")
+    p.add_argument("--compress", action="store_true", help="gzip 압축")
+    p.add_argument("--no-images", action="store_true", help="이미지 제외")
+    p.add_argument("--every", type=float, metavar="MIN", help="지정한 분 간격으로 계속 백업")
+    p.set_defaults(func=cmd_backup, needs_db=False)
+
+    p = sub.add_parser("backups", help="스냅숏 목록")
+    p.add_argument("--dir", default="backups")
+    p.set_defaults(func=cmd_backups, needs_db=False)
+
+    p = sub.add_parser("restore", help="스냅숏 무결성 확인 후 복원")
+    p.add_argument("snapshot")
+    p.add_argument("--dir", default="backups")
+    p.add_argument("--to", help="복원할 DB 경로 (기본: --db)")
+    p.add_argument("--images", action="store_true", help="없어진 이미지 파일도 복원")
+    p.set_defaults(func=cmd_restore, needs_db=False)
+
+    p = sub.add_parser("dupes", help="중복/유사 상품 후보 그룹 찾기")
+    p.add_argument("--threshold", type=float, help="최소 유사도 (0~1, 기본 0.6)")
+    p.add_argument("--images", action="store_true", help="대표 이미지 지각 해시도 비교 (Pillow 필요)")
+    p.add_argument("--workers", type=int, help="프로세스 수 (기본: CPU 수)")
+    p.add_argument("--json", metavar="PATH", help="전체 결과를 JSON 으로 저장")
+    p.add_argument("--show", type=int, default=50, help="화면에 보여줄 그룹 수")
+    p.set_defaults(func=cmd_dupes)
+
+    p = sub.add_parser("merge", help="KEEP 상품에 나머지 상품을 합치고 삭제")
+    p.add_argument("keep", type=int)
+    p.add_argument("ids", nargs="+", type=int)
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser("import", help="JSON Lines 상품 목록을 상품번호 기준으로 입력/갱신 (upsert)")
+    p.add_argument("paths", nargs="+", help="파일 경로 (- 는 표준입력)")
+    p.add_argument("--match-id", action="store_true",
+                   help="상품번호 없는 행은 같은 id 의 상품을 갱신 (같은 DB 에서 내보낸 목록일 때)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("prices-load", help="금 시세 CSV(날짜,시세) 일괄 입력")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--don", action="store_true", help="시세가 1돈(3.75g) 기준일 때")
+    p.set_defaults(func=cmd_prices_load)
+
+    p = sub.add_parser("prices", help="기간별 금 시세 (순금 1g)")
+    p.add_argument("--from", dest="start")
+    p.add_argument("--to", dest="end")
+    p.set_defaults(func=cmd_prices)
+
+    p = sub.add_parser("valuation", help="기간 동안 날짜별 재고 평가액")
+    p.add_argument("--from", dest="start", required=True)
+    p.add_argument("--to", dest="end", default=date.today().isoformat())
+    p.add_argument("--format", choices=("tsv", "json"), default="tsv")
+    p.set_defaults(func=cmd_valuation)
+
+    p = sub.add_parser("sync-import", help="다른 매장의 델타 파일 적용")
+    p.add_argument("paths", nargs="+")
+    p.set_defaults(func=cmd_sync_import)
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    # 백업/복원은 DB 를 열지 않음 (깨진 DB 에서 마이그레이션이 실패해도 복원할 수 있게)
+    dm = None
+    try:
+        if getattr(args, "needs_db", True):
+            dm = DataManager(args.db)
+        return args.func(dm, args)
+    except ValueError as e:          # 잘못된 필터 값 등
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+    except (BackupError, sqlite3.DatabaseError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        if dm is None and getattr(args, "needs_db", True):
+            print("# DB 가 손상되었으면 restore 로 스냅숏에서 복원하세요", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # `... | head` 처럼 출력을 도중에 끊어도 트레이스백 없이 종료
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        if dm is not None:
+            dm.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,182 +1,541 @@
 
-import sqlite3, json
+import sqlite3, json, queue
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Dict
-from .models import Product
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple
+from .models import (WRITE_NAMES, Product, SetSummary, insert_sql, product_fields,
+                     product_params, to_db, update_sql)
+from . import migrations, sync
+
+# 정렬 지정 ("weight_g", "asc"|"desc") / 그룹 지정 ("supplier_name", "A공장")
+OrderBy = Tuple[str, str]
+Group = Tuple[str, str]
+# keyset 커서: 정렬 컬럼 값들 (기본 정렬이면 (is_favorite, id), 그 외 (정렬 컬럼, id))
+Cursor = Tuple
+
+# ORDER BY 로 허용하는 컬럼 (사용자 입력은 이 목록으로만 SQL 에 들어감)
+SORT_COLUMNS = ("id", "category", "name", "supplier_name", "supplier_item_no", "product_code",
+                "karat", "weight_g", "size", "total_qb_qty", "labor_cost1", "labor_cost2",
+                "set_no", "discontinued", "stock_qty", "is_favorite", "created_at", "updated_at")
+GROUP_COLUMNS = ("supplier_name", "set_no", "category", "karat")
+
+def _order_columns(order_by: OrderBy | None) -> List[Tuple[str, bool]]:
+    """[(컬럼, 내림차순 여부)] — 항상 id 로 끝나므로 순서가 유일하게 정해진다"""
+    if order_by is None:
+        return [("is_favorite", True), ("id", True)]
+    col, direction = order_by
+    if col not in SORT_COLUMNS:
+        raise ValueError(f"정렬할 수 없는 컬럼: {col}")
+    if str(direction).lower() not in ("asc", "desc"):
+        raise ValueError(f"정렬 방향은 asc / desc: {direction}")
+    desc = str(direction).lower() == "desc"
+    return [("id", desc)] if col == "id" else [(col, desc), ("id", desc)]
+
+def _keyset_clause(order: List[Tuple[str, bool]], after: Cursor) -> Tuple[str, list]:
+    """커서 다음 행 조건. 인덱스를 탈 수 있게 행 값 비교를 쓰고 NULL(ASC 맨 앞, DESC 맨 뒤)을 따로 처리"""
+    if len(after) != len(order):
+        raise ValueError("정렬 기준과 맞지 않는 커서")
+    if len(order) == 1:
+        col, desc = order[0]
+        return f"{col} {'<' if desc else '>'} ?", [after[0]]
+    (col, desc), _ = order
+    value, last_id = after
+    if desc:
+        if value is None:
+            return f"({col} IS NULL AND id < ?)", [last_id]
+        return f"(({col}, id) < (?, ?) OR {col} IS NULL)", [value, last_id]
+    if value is None:
+        return f"(({col} IS NULL AND id > ?) OR {col} IS NOT NULL)", [last_id]
+    return f"({col}, id) > (?, ?)", [value, last_id]
+
+# 상품 조회용 SELECT (추가 이미지는 product_images 에서 JSON 배열로 모아 옴)
+PRODUCT_SELECT = f"SELECT p.*, {migrations.EXTRA_IMAGES_SQL} AS extra_images FROM products p"
+
+# 세트 집계 (set_summary 캐시를 채울 때와 읽기 전용 연결에서 바로 계산할 때 공용)
+SET_SUMMARY_SELECT = """
+    SELECT set_no,
+           COUNT(*)                                                        AS members,
+           COALESCE(SUM(weight_g), 0)                                      AS total_weight_g,
+           COALESCE(SUM(COALESCE(labor_cost1, 0) + COALESCE(labor_cost2, 0)), 0) AS total_labor,
+           MAX(MIN(COALESCE(stock_qty, 0)), 0)                             AS complete_sets
+    FROM products"""
+
+# ─── 검색 필터 ──────────────────────────────
+# filters 키는 "컬럼" 또는 "컬럼__연산자":
+#   {"karat": "18K", "weight_g__between": "3,5", "stock_qty__gt": 0, "category__in": ["R", "N"]}
+# 값은 문자열(CLI/HTTP 그대로) 또는 숫자/리스트. 모두 ? 파라미터로 SQL 에 넘어간다.
+TEXT_FILTER_COLUMNS = ("name", "supplier_name", "supplier_item_no", "product_code",
+                       "set_no", "size", "notes")
+CODE_FILTER_COLUMNS = ("category", "karat")          # 정해진 코드값 → 정확히 일치
+NUMERIC_FILTER_COLUMNS = ("stock_qty", "total_qb_qty", "weight_g", "labor_cost1", "labor_cost2")
+BOOL_FILTER_COLUMNS = ("discontinued", "is_favorite")
+FILTER_COLUMNS = (TEXT_FILTER_COLUMNS + CODE_FILTER_COLUMNS + NUMERIC_FILTER_COLUMNS
+                  + BOOL_FILTER_COLUMNS)
+FILTER_OPS = {"eq": "=", "ne": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+def _compile_filter(key: str, val) -> Tuple[str, list] | None:
+    """
+    필터 하나 → (WHERE 조각, 파라미터). 빈 값이나 연산자 없는 모르는 키는 None,
+    잘못된 값이나 "컬럼__연산자" 의 모르는 컬럼(오타)은 ValueError
+    """
+    col, sep, op = key.partition("__")
+    if sep and col not in FILTER_COLUMNS:
+        raise ValueError(f"알 수 없는 필터 컬럼: {key}")
+    if isinstance(val, str):
+        val = val.strip()
+    if val is None or val == "" or val == [] or val == ():
+        return None
+
+    if col in BOOL_FILTER_COLUMNS:
+        if op not in ("", "eq"):
+            raise ValueError(f"{col} 에는 {op} 연산자를 쓸 수 없습니다")
+        on = val if isinstance(val, bool) else str(val).upper() in ("Y", "TRUE", "1")
+        return f"{col} = ?", [int(on)]
+
+    if col in NUMERIC_FILTER_COLUMNS:
+        conv = _to_number
+    elif col in CODE_FILTER_COLUMNS:
+        conv = lambda v: str(v).strip().upper()
+    elif col in TEXT_FILTER_COLUMNS:
+        conv = lambda v: str(v).strip()
+    else:
+        return None
+
+    if op == "" and col in TEXT_FILTER_COLUMNS:
+        # 자유 입력 문자열 → 부분 일치, 대소문자 구분 안 함
+        return f"{col} LIKE ? COLLATE NOCASE", [f"%{val}%"]
+    if op in ("", "eq", "ne", "gt", "gte", "lt", "lte"):
+        return f"{col} {FILTER_OPS[op or 'eq']} ?", [conv(val)]
+    if op == "in":
+        items = [conv(v) for v in _split_values(val) if str(v).strip()]
+        if not items:
+            return None
+        return f"{col} IN ({','.join('?' * len(items))})", items
+    if op == "between":
+        items = _split_values(val, keep_empty=True)
+        if len(items) != 2:
+            raise ValueError(f"{key}: '최소,최대' 형식이어야 합니다 (한쪽은 비워도 됨)")
+        lo, hi = (conv(v) if str(v).strip() else None for v in items)
+        if lo is not None and hi is not None:
+            return f"{col} BETWEEN ? AND ?", [lo, hi]
+        if lo is not None:
+            return f"{col} >= ?", [lo]
+        if hi is not None:
+            return f"{col} <= ?", [hi]
+        return None
+    if op == "like" and col in TEXT_FILTER_COLUMNS:
+        return f"{col} LIKE ? COLLATE NOCASE", [f"%{val}%"]
+    raise ValueError(f"알 수 없는 필터 연산자: {key}")
+
+def _split_values(val, keep_empty: bool = False) -> list:
+    if isinstance(val, str):
+        sep = ".." if ".." in val else ","
+        parts = [v.strip() for v in val.split(sep)]
+        return parts if keep_empty else [v for v in parts if v]
+    return list(val)
+
+def _to_number(v) -> int | float:
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v
+    text = str(v).strip().replace(",", "")
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            raise ValueError(f"숫자가 아닙니다: {v!r}") from None
+
+# ─── products 쓰기 SQL (컬럼 표는 models.WRITE_COLUMNS) ─────
+INSERT_SQL = insert_sql()
+UPDATE_SQL = update_sql()
+# 상품번호 유일 인덱스(부분 인덱스)가 충돌 대상. 값이 모두 같으면 갱신하지 않음 (트리거·updated_at 유지)
+_UPSERT_COLS = tuple(c for c in WRITE_NAMES if c != "product_code")
+UPSERT_SQL = (f"{INSERT_SQL} ON CONFLICT (product_code) WHERE product_code <> '' DO UPDATE SET "
+              f"{''.join(f'{c}=excluded.{c},' for c in _UPSERT_COLS)}updated_at=CURRENT_TIMESTAMP "
+              f"WHERE {' OR '.join(f'{c} IS NOT excluded.{c}' for c in _UPSERT_COLS)} "
+              f"RETURNING id")
+
+
+def changed_fields(old: Product, new: Product) -> List[str]:
+    """두 Product 사이에 값이 다른 쓰기 컬럼 (+ "extra_images"). update_product(fields=...) 용"""
+    fields = [c for c in WRITE_NAMES if getattr(old, c) != getattr(new, c)]
+    if (old.extra_images or []) != (new.extra_images or []):
+        fields.append("extra_images")
+    return fields
+
+
+# merge_products 에서 남길 상품에 비어 있으면 합쳐지는 상품 값으로 채우는 필드
+MERGE_FILL_FIELDS = ("category", "supplier_name", "supplier_item_no", "product_code", "karat",
+                     "size", "set_no", "image_path")
 
 class DataManager:
-    def __init__(self, db_path: str | Path = "gold_data.db"):
+    def __init__(self, db_path: str | Path = "gold_data.db", *,
+                 readonly: bool = False, check_same_thread: bool = True):
+        """
+        readonly          : 읽기 전용 연결 (테이블 생성 안 함, 서버 읽기 풀용)
+        check_same_thread : False 면 다른 스레드에서도 연결 사용 가능 (호출 측에서 잠금 책임)
+        """
         self.db_path = Path(db_path)
-        self.conn = sqlite3.connect(self.db_path)
+        self.readonly = readonly
+        if readonly:
+            self.conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro",
+                                        uri=True, check_same_thread=check_same_thread)
+        else:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread)
         self.conn.row_factory = sqlite3.Row
-        self._create_table()
-
-    def _create_table(self):
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT,
-                name TEXT NOT NULL,
-                supplier_name TEXT,
-                supplier_item_no TEXT,
-                product_code TEXT,
-                karat TEXT,
-                weight_g REAL,
-                size TEXT,
-                total_qb_qty TEXT,
-                labor_cost1 REAL,
-                labor_cost2 REAL,
-                set_no TEXT,
-                discontinued INTEGER DEFAULT 0,
-                stock_qty INTEGER,
-                image_path TEXT,
-                extra_images TEXT,
-                notes TEXT,
-                is_favorite INTEGER DEFAULT 0
-            )
-        """)
-        self.conn.commit()
+        # 상품번호 → id (warm_code_index 로 채움, None 이면 인덱스 조회만 사용).
+        # 상품번호가 바뀌거나 삭제돼 남은 항목은 get_by_code 가 행과 맞춰 보고 고치므로 따로 지우지 않음
+        self._code_ids: Dict[str, int] | None = None
+        if not readonly:
+            migrations.migrate(self.conn)    # PRAGMA user_version 기준 스키마 갱신
+            sync.install(self.conn)          # 매장 간 동기화용 변경 로그 트리거
 
     def _row_to_product(self, row: sqlite3.Row | None) -> Product | None:
         if row is None:
             return None
-        extra_images = json.loads(row["extra_images"] or "[]")
-        return Product(
-            id=row["id"],
-            category=row["category"],
-            name=row["name"],
-            supplier_name=row["supplier_name"],
-            supplier_item_no=row["supplier_item_no"],
-            product_code=row["product_code"],
-            karat=row["karat"],
-            weight_g=row["weight_g"],
-            size=row["size"],
-            total_qb_qty=row["total_qb_qty"],
-            labor_cost1=row["labor_cost1"],
-            labor_cost2=row["labor_cost2"],
-            set_no=row["set_no"],
-            discontinued=bool(row["discontinued"]),
-            stock_qty=row["stock_qty"],
-            image_path=row["image_path"],
-            extra_images=extra_images,
-            notes=row["notes"],
-            is_favorite=bool(row["is_favorite"]),
-        )
+        return Product(id=row["id"], **product_fields(row),
+                       extra_images=json.loads(row["extra_images"] or "[]"),
+                       created_at=row["created_at"], updated_at=row["updated_at"])
+
+    def _write_images(self, product_id: int, paths: List[str] | None, replace: bool) -> bool:
+        """추가 이미지 목록 저장. replace=True 면 바뀐 경우에만 기존 목록을 교체. 반환: 썼는지 여부"""
+        paths = [p for p in (paths or []) if p]
+        if replace:
+            current = [r[0] for r in self.conn.execute(
+                "SELECT path FROM product_images WHERE product_id=? ORDER BY position", (product_id,))]
+            if current == paths:
+                return False
+            self.conn.execute("DELETE FROM product_images WHERE product_id=?", (product_id,))
+        self.conn.executemany(
+            "INSERT INTO product_images (product_id, position, path) VALUES (?,?,?)",
+            ((product_id, i, path) for i, path in enumerate(paths)))
+        return bool(paths) or replace
 
     # CRUD
     def add_product(self, product: Product) -> int:
-        with self.conn:
-            cur = self.conn.execute(
-                """INSERT INTO products
-                (category,name,supplier_name,supplier_item_no,product_code,karat,weight_g,size,total_qb_qty,
-                 labor_cost1,labor_cost2,set_no,discontinued,stock_qty,image_path,extra_images,notes,is_favorite)
-                 VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-                (
-                    product.category,
-                    product.name,
-                    product.supplier_name,
-                    product.supplier_item_no,
-                    product.product_code,
-                    product.karat,
-                    product.weight_g,
-                    product.size,
-                    product.total_qb_qty,
-                    product.labor_cost1,
-                    product.labor_cost2,
-                    product.set_no,
-                    int(product.discontinued),
-                    product.stock_qty,
-                    product.image_path,
-                    json.dumps(product.extra_images or []),
-                    product.notes,
-                    int(product.is_favorite),
-                ),
-            )
-            return cur.lastrowid
+        product.product_code = (product.product_code or "").strip()
+        with self._code_guard(product.product_code), self.conn:
+            cur = self.conn.execute(INSERT_SQL, product_params(product))
+            self._write_images(cur.lastrowid, product.extra_images, replace=False)
+        self._remember_code(product.product_code, cur.lastrowid)
+        return cur.lastrowid
 
-    def update_product(self, product: Product):
+    def update_product(self, product: Product, fields: Iterable[str] | None = None):
+        """
+        fields 를 주면 그 컬럼만 쓴다 (changed_fields 결과 등, "extra_images" 포함 가능).
+        빈 목록이면 아무것도 쓰지 않음. 안 주면 지금 행과 비교해 바뀐 컬럼만 쓴다
+        """
+        product.product_code = (product.product_code or "").strip()
+        if fields is None:
+            # 모든 컬럼을 SET 하면 값이 같아도 그 컬럼의 인덱스를 전부 다시 쓰므로 바뀐 컬럼만 씀
+            old = self.get_product(product.id)
+            if old is None:
+                return
+            fields = changed_fields(old, product)
+        self.update_fields(product.id, {f: getattr(product, f) for f in fields})
+
+    def _update_row(self, product: Product):
+        """UPDATE + 추가 이미지 (트랜잭션은 호출 측)"""
+        self.conn.execute(UPDATE_SQL, product_params(product) + [product.id])
+        self._write_images(product.id, product.extra_images, replace=True)
+
+    def update_fields(self, product_id: int, values: Dict[str, object]) -> bool:
+        """
+        지정한 컬럼만 갱신 (판매 시 재고만 바꾸는 경우 등). 값은 Product 필드 형식.
+        바뀐 컬럼만 UPDATE 에 들어가므로 그 컬럼에 걸린 트리거만 동작한다.
+        반환: 상품이 있으면 True
+        """
+        values = dict(values)
+        images = values.pop("extra_images", None)
+        has_images = images is not None
+        unknown = [c for c in values if c not in WRITE_NAMES]
+        if unknown:
+            raise ValueError(f"수정할 수 없는 컬럼: {', '.join(unknown)}")
+        if not values and not has_images:
+            return self.conn.execute("SELECT 1 FROM products WHERE id=?", (product_id,)).fetchone() is not None
+        cols = tuple(c for c in WRITE_NAMES if c in values)       # 같은 컬럼 조합 → 같은 SQL 문
+        code = (values.get("product_code") or "").strip() if "product_code" in values else None
+        if code is not None:
+            values["product_code"] = code
+        with self._code_guard(code), self.conn:
+            found = True
+            if cols:
+                params = [to_db(c, values[c]) for c in cols]
+                params.append(product_id)
+                found = self.conn.execute(update_sql(cols), params).rowcount > 0
+            elif has_images:
+                found = self.conn.execute("SELECT 1 FROM products WHERE id=?", (product_id,)).fetchone() is not None
+            if found and has_images:
+                self._write_images(product_id, images, replace=True)
+        if found and code is not None:
+            self._remember_code(code, product_id)
+        return found
+
+    def upsert_products(self, products: Iterable[Product], match_id: bool = False) -> Dict[str, int]:
+        """
+        상품번호 기준 일괄 입력 (한 트랜잭션). 같은 상품번호가 있으면 나머지 컬럼을 덮어쓰고
+        (값이 모두 같으면 건드리지 않음), 없으면 새로 추가한다. 처리한 Product 의 id 를 채운다.
+        extra_images 가 None 이면 추가 이미지는 그대로 둔다.
+        상품번호가 빈 행은 매번 새 상품이 되어 버리므로 건너뛴다. match_id=True 면 (같은 DB 에서
+        내보낸 목록일 때) 같은 id 의 상품번호 없는 상품을 갱신하고, 그런 상품이 없으면 건너뛴다.
+        반환: {"inserted", "updated", "unchanged", "skipped"} 건수
+        """
+        result = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
         with self.conn:
-            self.conn.execute(
-                """UPDATE products SET
-                category=?,name=?,supplier_name=?,supplier_item_no=?,product_code=?,karat=?,weight_g=?,size=?,total_qb_qty=?,
-                labor_cost1=?,labor_cost2=?,set_no=?,discontinued=?,stock_qty=?,image_path=?,extra_images=?,notes=?,is_favorite=?
-                WHERE id=?""",
-                (
-                    product.category,
-                    product.name,
-                    product.supplier_name,
-                    product.supplier_item_no,
-                    product.product_code,
-                    product.karat,
-                    product.weight_g,
-                    product.size,
-                    product.total_qb_qty,
-                    product.labor_cost1,
-                    product.labor_cost2,
-                    product.set_no,
-                    int(product.discontinued),
-                    product.stock_qty,
-                    product.image_path,
-                    json.dumps(product.extra_images or []),
-                    product.notes,
-                    int(product.is_favorite),
-                    product.id,
-                ),
-            )
+            # AUTOINCREMENT 라 새로 추가된 행의 id 는 항상 기존 id 보다 큼 → 추가/갱신 구분
+            top = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+            for p in products:
+                p.product_code = (p.product_code or "").strip()
+                if p.product_code:
+                    kind, top = self._upsert_by_code(p, top)
+                elif match_id and p.id is not None:
+                    kind = self._update_by_id(p)
+                else:
+                    kind = "skipped"
+                result[kind] += 1
+        return result
+
+    def _upsert_by_code(self, p: Product, top: int) -> Tuple[str, int]:
+        row = self.conn.execute(UPSERT_SQL, product_params(p)).fetchone()
+        if row is None:                 # 값이 같아 갱신을 건너뜀 → RETURNING 없음
+            row = self.conn.execute(
+                "SELECT id FROM products WHERE product_code = ? AND product_code <> ''",
+                (p.product_code,)).fetchone()
+            kind = "unchanged"
+        elif row[0] > top:
+            kind, top = "inserted", row[0]
+        else:
+            kind = "updated"
+        p.id = row[0]
+        if p.extra_images is not None:
+            if self._write_images(p.id, p.extra_images, replace=kind != "inserted") and kind == "unchanged":
+                kind = "updated"
+        self._remember_code(p.product_code, p.id)   # 롤백되어도 get_by_code 가 확인 후 고침
+        return kind, top
+
+    def _update_by_id(self, p: Product) -> str:
+        """상품번호 없는 상품을 id 로 맞춰 바뀐 컬럼만 갱신 (트랜잭션은 호출 측)"""
+        old = self.get_product(p.id)
+        if old is None or old.product_code:
+            return "skipped"
+        cols = tuple(c for c in changed_fields(old, p) if c != "extra_images")
+        if cols:
+            self.conn.execute(update_sql(cols), [to_db(c, getattr(p, c)) for c in cols] + [p.id])
+        images = p.extra_images is not None and self._write_images(p.id, p.extra_images, replace=True)
+        return "updated" if cols or images else "unchanged"
 
     def delete_product(self, product_id: int):
         with self.conn:
             self.conn.execute("DELETE FROM products WHERE id=?", (product_id,))
 
+    # 중복 상품 합치기 (dedup.find_duplicates 결과 정리용)
+    def merge_products(self, keep_id: int, other_ids: Iterable[int]) -> Product:
+        """
+        other_ids 상품을 keep_id 로 합치고 삭제한다 (한 트랜잭션).
+        - 재고는 더하고, keep 쪽에 비어 있는 값은 다른 상품 값으로 채움
+        - 다른 상품의 대표/추가 이미지는 keep 의 추가 이미지로, 즐겨찾기는 하나라도 있으면 유지
+        - 비고에 합친 상품 번호와 이름을 남김
+        """
+        # 같은 id 가 여러 번 와도 한 번만 합침 (재고가 두 번 더해지지 않게), 순서는 유지
+        other_ids = [i for i in dict.fromkeys(int(i) for i in other_ids) if i != keep_id]
+        keep = self.get_product(keep_id)
+        others = [self.get_product(i) for i in other_ids]
+        missing = [i for i, o in zip(other_ids, others) if o is None]
+        if keep is None or missing:
+            raise ValueError(f"상품 없음: {[keep_id] if keep is None else missing}")
+        if not others:
+            return keep
+
+        for f in MERGE_FILL_FIELDS:
+            if not getattr(keep, f):
+                setattr(keep, f, next((getattr(o, f) for o in others if getattr(o, f)), getattr(keep, f)))
+        keep.stock_qty = (keep.stock_qty or 0) + sum(o.stock_qty or 0 for o in others)
+        keep.is_favorite = keep.is_favorite or any(o.is_favorite for o in others)
+        images = list(keep.extra_images or [])
+        for o in others:
+            for path in [o.image_path, *(o.extra_images or [])]:
+                if path and path != keep.image_path and path not in images:
+                    images.append(path)
+        keep.extra_images = images
+        notes = [keep.notes or ""]
+        for o in others:
+            notes.append(f"병합: #{o.id} {o.name}" + (f" / {o.notes}" if o.notes else ""))
+        keep.notes = "\n".join(n for n in notes if n)
+
+        with self._code_guard(keep.product_code), self.conn:
+            # 상품번호 유일 인덱스 때문에 먼저 지우고 keep 을 갱신
+            self.conn.executemany("DELETE FROM products WHERE id=?", ((i,) for i in other_ids))
+            self._update_row(keep)
+        self._remember_code(keep.product_code, keep_id)
+        return self.get_product(keep_id)
+
     def get_product(self, product_id: int) -> Product | None:
-        row = self.conn.execute("SELECT * FROM products WHERE id=?", (product_id,)).fetchone()
+        row = self.conn.execute(f"{PRODUCT_SELECT} WHERE id=?", (product_id,)).fetchone()
         return self._row_to_product(row)
 
-    def search_products(self, filters: Dict[str, str] | None = None,
-                        any_text: str = "") -> List[Product]:
+    # 바코드(상품번호) 정확 일치 조회
+    def get_by_code(self, code: str) -> Product | None:
+        """
+        상품번호가 정확히 같은 상품. 메모리 맵에 있으면 id 로 바로 읽고,
+        없거나 다른 연결이 바꿔서 맞지 않으면 유일 인덱스로 찾은 뒤 맵을 고친다.
+        """
+        code = (code or "").strip()
+        if not code:
+            return None
+        if self._code_ids is not None:
+            pid = self._code_ids.get(code)
+            if pid is not None:
+                product = self.get_product(pid)
+                if product is not None and product.product_code == code:
+                    return product
+        row = self.conn.execute(f"{PRODUCT_SELECT} WHERE product_code = ? AND product_code <> ''",
+                                (code,)).fetchone()
+        product = self._row_to_product(row)
+        if self._code_ids is not None:
+            if product is None:
+                self._code_ids.pop(code, None)
+            else:
+                self._code_ids[code] = product.id
+        return product
+
+    def warm_code_index(self) -> int:
+        """상품번호 → id 맵을 한 번에 채움 (스캔 창을 쓰는 GUI 시작 시). 반환: 항목 수"""
+        self._code_ids = {code: pid for pid, code in self.conn.execute(
+            "SELECT id, product_code FROM products WHERE product_code <> ''")}
+        return len(self._code_ids)
+
+    def _remember_code(self, code: str, product_id: int):
+        if self._code_ids is not None and code:
+            self._code_ids[code] = product_id
+
+    @contextmanager
+    def _code_guard(self, code: str):
+        """상품번호 중복(유일 인덱스 위반)을 ValueError 로 바꿈"""
+        try:
+            yield
+        except sqlite3.IntegrityError as e:
+            if "product_code" in str(e):
+                raise ValueError(f"이미 등록된 상품번호: {code}") from None
+            raise
+
+    def search_products(self, filters: Dict[str, object] | None = None,
+                        any_text: str = "", order_by: OrderBy | None = None) -> List[Product]:
         """
         filters  : 개별 필드 검색   {"name":"루비", "supplier_name":"A공장"}
         any_text : 모든 주요 컬럼을 한꺼번에 OR 검색
+        order_by : ("weight_g", "desc") 처럼 정렬 컬럼/방향. None 이면 즐겨찾기 우선, 최신순
         """
-        filters = filters or {}
-        column_map = {
-            "category": "category",
-            "name": "name",
-            "supplier_name": "supplier_name",
-            "supplier_item_no": "supplier_item_no",
-            "product_code": "product_code",
-            "set_no": "set_no",
-            "karat": "karat",
-            "discontinued": "discontinued",
-            "is_favorite": "is_favorite"
-        }
+        return list(self.iter_products(filters, any_text, order_by=order_by))
 
-        clauses, params = [], []
+    def iter_products(self, filters: Dict[str, object] | None = None,
+                      any_text: str = "", after: Cursor | None = None,
+                      order_by: OrderBy | None = None) -> Iterator[Product]:
+        """search_products 와 같은 조건이지만 결과를 한 줄씩 흘려보냄 (CLI 스트리밍용)"""
+        # 조건 오류(ValueError)는 첫 행을 읽기 전에 바로 드러나도록 여기서 쿼리를 만든다
+        sql, params = self._build_search_query(filters, any_text, after, order_by)
+        return self._iter_rows(self.conn.execute(sql, params))
 
-        # 개별 필터
-        for ui_key, val in filters.items():
-            val = (val or "").strip()
-            if not val:
-                continue
-            col = column_map.get(ui_key)
-            if not col:
-                continue
-
-            if col == "discontinued":
-                clauses.append("discontinued = ?")
-                params.append(1 if val.upper() in ("Y", "TRUE", "1") else 0)
-            elif col == "is_favorite":            # ★ 추가: 즐겨찾기 필터
-                clauses.append("is_favorite = ?")
-                params.append(1 if val in ("1", "True", "true", "Y") else 0)
-            elif col in ("stock_qty", "total_qb_qty", "weight_g",
-                         "labor_cost1", "labor_cost2"):
-                # 숫자 필드는 정확 매칭
-                clauses.append(f"{col} = ?")
-                params.append(val)
+    def _iter_rows(self, cur: sqlite3.Cursor) -> Iterator[Product]:
+        while True:
+            rows = cur.fetchmany(500)
+            if not rows:
+                break
+            for r in rows:
+                yield self._row_to_product(r)
+
+    def search_page(self, filters: Dict[str, object] | None = None, any_text: str = "",
+                    after: Cursor | None = None, limit: int = 100,
+                    order_by: OrderBy | None = None, group: Group | None = None
+                    ) -> Tuple[List[Product], Cursor | None]:
+        """
+        keyset 페이지 조회. after 는 같은 order_by 로 직전 페이지가 돌려준 커서.
+        group=("supplier_name", "A공장") 이면 그 그룹의 상품만.
+        반환: (상품 목록, 다음 커서 | 마지막 페이지면 None)
+        """
+        sql, params = self._build_search_query(filters, any_text, after, order_by, group)
+        sql += " LIMIT ?"
+        rows = self.conn.execute(sql, params + [limit + 1]).fetchall()
+        products = [self._row_to_product(r) for r in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = tuple(last[col] for col, _ in _order_columns(order_by))
+        return products, next_cursor
+
+    def group_counts(self, group_by: str, filters: Dict[str, object] | None = None,
+                     any_text: str = "") -> List[Tuple[str, int, int]]:
+        """
+        그룹별 (값, 상품 수, 재고 합계). 집계는 SQL 에서 하며 NULL 과 "" 는 한 그룹("")으로 합친다.
+        group_by 는 GROUP_COLUMNS 중 하나.
+        """
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"그룹 기준으로 쓸 수 없는 컬럼: {group_by}")
+        where, params = self._build_where(filters, any_text)
+        sql = (f"SELECT {group_by} AS g, COUNT(*) AS n, COALESCE(SUM(stock_qty), 0) AS stock "
+               f"FROM products p{where} GROUP BY {group_by} ORDER BY {group_by}")
+        merged: Dict[str, List[int]] = {}
+        for row in self.conn.execute(sql, params):
+            acc = merged.setdefault(row["g"] or "", [0, 0])
+            acc[0] += row["n"]
+            acc[1] += row["stock"]
+        return [(g, n, stock) for g, (n, stock) in merged.items()]
+
+    # 세트 (같은 세트번호를 가진 귀걸이/목걸이/반지 등)
+    def get_set_members(self, set_no: str) -> List[Product]:
+        """세트 구성 상품 전체 (세트번호 인덱스로 한 번에 조회)"""
+        rows = self.conn.execute(f"{PRODUCT_SELECT} WHERE set_no = ? ORDER BY category, id",
+                                 (set_no,)).fetchall()
+        return [self._row_to_product(r) for r in rows]
+
+    def set_summary(self, set_no: str) -> SetSummary | None:
+        """세트 집계 (캐시 우선). 구성 상품이 없으면 None"""
+        if not set_no:
+            return None
+        cached = "SELECT * FROM set_summary WHERE set_no = ?"
+        row = self.conn.execute(cached, (set_no,)).fetchone()
+        if row is None:
+            if self.readonly:
+                row = self.conn.execute(f"{SET_SUMMARY_SELECT} WHERE set_no = ? GROUP BY set_no",
+                                        (set_no,)).fetchone()
             else:
-                # 문자열 → LIKE, 대소문자 구분 안 함
-                clauses.append(f"{col} LIKE ? COLLATE NOCASE")
-                params.append(f"%{val}%")
+                # 계산과 저장을 한 문장으로 — 사이에 다른 연결이 구성 상품을 바꿔도 오래된 값이 남지 않음
+                with self.conn:
+                    self.conn.execute(f"INSERT OR REPLACE INTO set_summary {SET_SUMMARY_SELECT} "
+                                      f"WHERE set_no = ? GROUP BY set_no", (set_no,))
+                    row = self.conn.execute(cached, (set_no,)).fetchone()
+        return SetSummary(**dict(row)) if row is not None else None
+
+    def list_sets(self, text: str = "") -> List[SetSummary]:
+        """
+        세트 목록과 집계 (세트번호 순). text 가 있으면 세트번호에 포함된 것만.
+        캐시에 없는 세트만 GROUP BY 로 다시 계산해서 채운다.
+        """
+        where, params = "WHERE set_no <> ''", []
+        if text.strip():
+            where += " AND set_no LIKE ? COLLATE NOCASE"
+            params.append(f"%{text.strip()}%")
+        if self.readonly:
+            sql = f"{SET_SUMMARY_SELECT} {where} GROUP BY set_no ORDER BY set_no"
+        else:
+            with self.conn:
+                self.conn.execute(
+                    f"INSERT INTO set_summary {SET_SUMMARY_SELECT} "
+                    f"WHERE set_no <> '' AND set_no NOT IN (SELECT set_no FROM set_summary) "
+                    f"GROUP BY set_no")
+            sql = f"SELECT * FROM set_summary {where} ORDER BY set_no"
+        return [SetSummary(**dict(r)) for r in self.conn.execute(sql, params)]
+
+    def _build_where(self, filters: Dict[str, object] | None = None, any_text: str = "",
+                     group: Group | None = None) -> Tuple[str, list]:
+        clauses, params = [], []
+
+        # 개별 필터 ("컬럼" 또는 "컬럼__연산자")
+        for key, val in (filters or {}).items():
+            compiled = _compile_filter(key, val)
+            if compiled:
+                clauses.append(compiled[0])
+                params.extend(compiled[1])
 
         # any_text가 있으면 주요 컬럼 OR 검색
         if any_text.strip():
@@ -186,15 +545,150 @@ class DataManager:
             clauses.append(f"({or_clause})")
             params.extend([f"%{any_text.strip()}%"] * len(cols))
 
-        # 쿼리 조립
-        sql = "SELECT * FROM products"
-        if clauses:
-            sql += " WHERE " + " AND ".join(clauses)
-        sql += " ORDER BY is_favorite DESC, id DESC"
+        # 그룹 보기: 한 그룹의 구성원 ("" 그룹은 NULL 포함)
+        if group is not None:
+            col, value = group
+            if col not in GROUP_COLUMNS:
+                raise ValueError(f"그룹 기준으로 쓸 수 없는 컬럼: {col}")
+            if value:
+                clauses.append(f"{col} = ?")
+                params.append(value)
+            else:
+                clauses.append(f"({col} IS NULL OR {col} = '')")
 
-        rows = self.conn.execute(sql, params).fetchall()
-        return [self._row_to_product(r) for r in rows]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _build_search_query(self, filters: Dict[str, object] | None = None,
+                            any_text: str = "", after: Cursor | None = None,
+                            order_by: OrderBy | None = None,
+                            group: Group | None = None) -> Tuple[str, list]:
+        order = _order_columns(order_by)
+        where, params = self._build_where(filters, any_text, group)
+
+        # keyset 페이지: 정렬 순서상 커서 다음 행부터
+        if after is not None:
+            clause, kparams = _keyset_clause(order, after)
+            where += (" AND " if where else " WHERE ") + clause
+            params.extend(kparams)
+
+        # 쿼리 조립
+        order_sql = ", ".join(f"{col} {'DESC' if desc else 'ASC'}" for col, desc in order)
+        return f"{PRODUCT_SELECT}{where} ORDER BY {order_sql}", params
 
     def toggle_favorite(self, product_id: int):
         with self.conn:
-            self.conn.execute("UPDATE products SET is_favorite = NOT is_favorite WHERE id=?", (product_id,))
+            self.conn.execute("UPDATE products SET is_favorite = NOT is_favorite, "
+                              "updated_at = CURRENT_TIMESTAMP WHERE id=?", (product_id,))
+
+    def adjust_stock(self, product_id: int, delta: int) -> int | None:
+        """
+        재고를 delta 만큼 증감하고 새 재고 수량 반환.
+        상품이 없으면 None, 재고가 음수가 되면 ValueError.
+        """
+        with self.conn:
+            row = self.conn.execute("SELECT stock_qty FROM products WHERE id=?",
+                                    (product_id,)).fetchone()
+            if row is None:
+                return None
+            new_qty = (row["stock_qty"] or 0) + int(delta)
+            if new_qty < 0:
+                raise ValueError(f"재고 부족: 현재 {row['stock_qty'] or 0}, 요청 {delta}")
+            self.conn.execute(update_sql(("stock_qty",)), (new_qty, product_id))
+            return new_qty
+
+    def data_version(self) -> int:
+        """다른 연결이 커밋할 때마다 바뀌는 값 (PRAGMA data_version)"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # 일괄 처리
+    def set_favorite(self, product_ids: Iterable[int], value: bool = True) -> int:
+        """여러 상품의 즐겨찾기 여부를 한 번에 지정. 변경된 행 수 반환"""
+        return self._set_flag("is_favorite", product_ids, value)
+
+    def set_discontinued(self, product_ids: Iterable[int], value: bool = True) -> int:
+        """여러 상품의 단종 여부를 한 번에 지정. 변경된 행 수 반환"""
+        return self._set_flag("discontinued", product_ids, value)
+
+    def _set_flag(self, col: str, product_ids: Iterable[int], value: bool) -> int:
+        with self.conn:
+            cur = self.conn.executemany(
+                f"UPDATE products SET {col}=?, updated_at=CURRENT_TIMESTAMP "
+                f"WHERE id=? AND {col} IS NOT ?",
+                ((int(value), int(pid), int(value)) for pid in product_ids),
+            )
+            return cur.rowcount
+
+    # 유지보수
+    def vacuum(self):
+        self.conn.execute("VACUUM")
+
+    def analyze(self):
+        with self.conn:
+            self.conn.execute("ANALYZE")
+
+    def integrity_check(self) -> List[str]:
+        """문제가 없으면 ["ok"] 반환"""
+        return [r[0] for r in self.conn.execute("PRAGMA integrity_check")]
+
+    def stats(self) -> Dict[str, object]:
+        row = self.conn.execute("""
+            SELECT COUNT(*)                                   AS products,
+                   COALESCE(SUM(stock_qty), 0)                AS stock_total,
+                   COALESCE(SUM(weight_g * stock_qty), 0)     AS stock_weight_g,
+                   COALESCE(SUM(is_favorite), 0)              AS favorites,
+                   COALESCE(SUM(discontinued), 0)             AS discontinued
+            FROM products
+        """).fetchone()
+        data = dict(row)
+        data["by_karat"] = {
+            (r["karat"] or ""): r["n"]
+            for r in self.conn.execute(
+                "SELECT karat, COUNT(*) AS n FROM products GROUP BY karat ORDER BY karat")
+        }
+        data["by_category"] = {
+            (r["category"] or ""): r["n"]
+            for r in self.conn.execute(
+                "SELECT category, COUNT(*) AS n FROM products GROUP BY category ORDER BY category")
+        }
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        data["db_bytes"] = page_size * page_count
+        data["free_bytes"] = page_size * free_pages
+        return data
+
+    def close(self):
+        self.conn.close()
+
+
+class DataManagerPool:
+    """
+    읽기 전용 DataManager 풀. 여러 스레드(HTTP 서버 등)가 쓰기 연결과 별개로
+    동시에 조회할 때 사용한다.
+
+        pool = DataManagerPool("gold_data.db", size=4)
+        with pool.acquire() as dm:
+            dm.search_products({"karat": "18K"})
+    """
+    def __init__(self, db_path: str | Path = "gold_data.db", size: int = 4):
+        self.db_path = Path(db_path)
+        self._idle: "queue.Queue[DataManager]" = queue.Queue()
+        self._all: List[DataManager] = []
+        for _ in range(size):
+            dm = DataManager(self.db_path, readonly=True, check_same_thread=False)
+            self._all.append(dm)
+            self._idle.put(dm)
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[DataManager]:
+        dm = self._idle.get(timeout=timeout)
+        try:
+            yield dm
+        finally:
+            if dm.conn.in_transaction:
+                dm.conn.rollback()
+            self._idle.put(dm)
+
+    def close(self):
+        for dm in self._all:
+            dm.close()
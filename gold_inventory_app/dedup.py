@@ -0,0 +1,280 @@
+"""
+중복 / 유사 상품 찾기 (배치 작업)
+
+    python -m gold_inventory_app.cli dupes --workers 4 [--images] [--json dupes.json]
+    python -m gold_inventory_app.cli merge 120 121 340      # 120 에 121, 340 을 합침
+
+모든 상품 쌍을 비교하지 않도록 (품목, 함량, 중량 구간) 블록 안에서만 비교한다.
+중량 구간 폭은 WEIGHT_TOL_G 이고 각 구간은 바로 다음 구간과도 비교하므로
+중량 차이가 WEIGHT_TOL_G 이하인 쌍은 빠짐없이 후보가 된다.
+
+블록 안에서는
+  - 상품명 trigram Jaccard 유사도 ≥ threshold (prefix filtering 역색인으로 후보만 계산)
+  - 같은 매입처에서 매입처상품번호가 공백/기호를 뺀 정규화 값으로 같으면 후보
+  - images=True 면 대표 이미지 dHash(64bit) 해밍 거리 (Pillow 필요). 8비트씩 8칸으로 나눠
+    한 칸이라도 같은 쌍만 비교하므로 거리 PHASH_MAX_DIST(≤7) 이하는 빠지지 않는다
+블록 묶음은 여러 프로세스에서 나눠 처리하고, 후보 쌍은 union-find 로 그룹으로 묶는다.
+"""
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+try:                                    # 이미지 비교는 선택 기능
+    from PIL import Image
+except ImportError:                     # pragma: no cover - Pillow 가 없는 환경
+    Image = None
+
+WEIGHT_TOL_G = 0.1          # 같은 상품으로 볼 중량 차이 (= 블록 구간 폭)
+_TOL_MG = int(round(WEIGHT_TOL_G * 1000))
+NAME_THRESHOLD = 0.6        # 후보로 볼 최소 유사도
+PHASH_MAX_DIST = 6          # dHash 해밍 거리 허용치 (8 칸 분할이라 7 이하만 가능)
+MAX_POSTING = 500           # 이미지 해시 칸이 이보다 흔하면 후보 생성에 쓰지 않음 (단색 배경 등)
+TASK_RECORDS = 5000         # 프로세스 작업 하나에 담을 대략의 상품 수
+
+# (id, 중량, 상품명, 매입처상품번호, 매입처, 대표 이미지)
+Record = Tuple[int, float | None, str, str, str, str]
+# (id1, id2, 유사도, 근거)  근거: "name" / "item_no" / "image" 를 '+' 로 연결
+Pair = Tuple[int, int, float, str]
+
+
+@dataclass
+class DuplicateGroup:
+    ids: List[int]
+    pairs: List[Pair] = field(default_factory=list)
+
+    @property
+    def best_score(self) -> float:
+        return max((p[2] for p in self.pairs), default=0.0)
+
+
+# ─── 정규화 / 유사도 ─────────────────────────
+def normalize(text: str | None) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower().strip()
+
+
+def normalize_item_no(text: str | None) -> str:
+    """'AB-12 3' → 'AB123' (공백·하이픈·점 등 무시)"""
+    return re.sub(r"[\W_]+", "", normalize(text)).upper()
+
+
+def trigrams(text: str) -> frozenset:
+    """단어마다 앞 2칸, 뒤 1칸을 공백으로 채운 3글자 조각 (pg_trgm 방식). 한글은 음절 단위"""
+    grams = set()
+    for word in re.findall(r"\w+", normalize(text)):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def dhash(path: str, size: int = 8) -> int | None:
+    """가로 차이 해시 (64bit). 파일이 없거나 읽을 수 없으면 None"""
+    if Image is None or not path:
+        return None
+    try:
+        with Image.open(path) as img:
+            small = img.convert("L").resize((size + 1, size))
+            px = list(small.getdata())
+    except (OSError, ValueError):
+        return None
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = px[row * (size + 1) + col]
+            bits = (bits << 1) | (left > px[row * (size + 1) + col + 1])
+    return bits
+
+
+# ─── 블록 나누기 ─────────────────────────────
+def _block_key(category, karat, weight) -> Tuple[str, str, int | None]:
+    # 정수 mg 으로 나눔 — 실수 나눗셈(3.1 // 0.1 == 30, 3.2 // 0.1 == 32)은 구간을 건너뛴다
+    bucket = int(round(weight * 1000)) // _TOL_MG if weight else None
+    return (normalize(category).upper(), normalize(karat).upper(), bucket)
+
+
+def _load_blocks(conn) -> Dict[tuple, List[Record]]:
+    blocks: Dict[tuple, List[Record]] = {}
+    cur = conn.execute("SELECT id, category, karat, weight_g, name, supplier_item_no, "
+                       "supplier_name, image_path FROM products")
+    while True:
+        rows = cur.fetchmany(5000)
+        if not rows:
+            break
+        for pid, category, karat, weight, name, item_no, supplier, image in rows:
+            blocks.setdefault(_block_key(category, karat, weight), []).append(
+                (pid, weight, name or "", item_no or "", supplier or "", image or ""))
+    return blocks
+
+
+def _units(blocks: Dict[tuple, List[Record]]):
+    """작업 단위 (구간 b 의 상품, 다음 구간 b+1 의 상품) — b 안의 쌍과 b × b+1 쌍을 맡는다"""
+    # 같은 (품목, 함량) 의 구간이 이어지도록 정렬 — 한 작업 안에서 다음 구간 특징값을 재사용
+    for (cat, karat, bucket) in sorted(blocks, key=lambda k: (k[0], k[1], k[2] is None, k[2] or 0)):
+        recs = blocks[(cat, karat, bucket)]
+        nxt = blocks.get((cat, karat, bucket + 1), []) if bucket is not None else []
+        yield recs, nxt
+
+
+def _tasks(blocks, size: int = TASK_RECORDS):
+    batch, n = [], 0
+    for recs, nxt in _units(blocks):
+        if len(recs) + len(nxt) < 2:
+            continue
+        batch.append((recs, nxt))
+        n += len(recs) + len(nxt)
+        if n >= size:
+            yield batch
+            batch, n = [], 0
+    if batch:
+        yield batch
+
+
+# ─── 비교 (작업 프로세스에서 실행) ──────────────
+def compare_units(units, threshold: float = NAME_THRESHOLD, images: bool = False) -> List[Pair]:
+    pairs: List[Pair] = []
+    features: Dict[int, tuple] = {}     # id → (trigram, 상품번호, 매입처, 해시), 다음 구간과 공유
+    for recs, nxt in units:
+        pairs.extend(_compare_unit(recs, nxt, threshold, images, features))
+        for r in recs:                  # 이 구간은 다시 쓰이지 않음
+            features.pop(r[0], None)
+    return pairs
+
+
+def _features(rec: Record, images: bool) -> tuple:
+    return (trigrams(rec[2]), normalize_item_no(rec[3]), normalize(rec[4]),
+            dhash(rec[5]) if images else None)
+
+
+def _compare_unit(recs: List[Record], nxt: List[Record], threshold: float,
+                  images: bool, features: Dict[int, tuple]) -> Iterable[Pair]:
+    allrecs = recs + nxt
+    n_own = len(recs)
+    feats = []
+    for r in allrecs:
+        f = features.get(r[0])
+        if f is None:
+            f = features[r[0]] = _features(r, images)
+        feats.append(f)
+    grams = [f[0] for f in feats]
+    items = [f[1] for f in feats]
+    suppliers = [f[2] for f in feats]
+    hashes = [f[3] for f in feats] if images else None
+
+    # 상품명 trigram (prefix filtering): 각 이름의 trigram 을 드문 순으로 세워
+    # 앞쪽 len - ceil(t × len) + 1 개만 쓴다. Jaccard ≥ t 인 두 이름은 이 앞쪽 조각을
+    # 반드시 하나 이상 공유하므로 빠지는 쌍 없이 "반지" 같은 흔한 조각의 쌍 폭발을 피한다
+    freq = Counter(t for g in grams for t in g)
+    name_keys = []
+    for g in grams:
+        prefix = len(g) - math.ceil(threshold * len(g)) + 1
+        name_keys.append(sorted(g, key=lambda t: (freq[t], t))[:prefix])
+    candidates = _key_pairs(name_keys, n_own)
+
+    # 같은 매입처 + 같은 매입처상품번호
+    candidates |= _key_pairs([[(suppliers[i], item)] if item else [] for i, item in enumerate(items)],
+                             n_own)
+
+    # 이미지 해시: 8비트 칸 중 하나라도 같은 것끼리
+    if hashes is not None:
+        bands = [[(k, (h >> (8 * k)) & 0xFF) for k in range(8)] if h is not None else []
+                 for h in hashes]
+        candidates |= _key_pairs(bands, n_own, MAX_POSTING)
+
+    for i, j in candidates:
+        ri, rj = allrecs[i], allrecs[j]
+        if ri[1] and rj[1] and abs(ri[1] - rj[1]) > WEIGHT_TOL_G + 1e-9:
+            continue
+        reasons, score = [], 0.0
+        name_sim = jaccard(grams[i], grams[j])
+        if name_sim >= threshold:
+            reasons.append("name")
+            score = name_sim
+        if items[i] and items[i] == items[j] and suppliers[i] == suppliers[j]:
+            reasons.append("item_no")
+            score = 1.0
+        if hashes is not None and hashes[i] is not None and hashes[j] is not None:
+            dist = bin(hashes[i] ^ hashes[j]).count("1")
+            if dist <= PHASH_MAX_DIST:
+                reasons.append("image")
+                score = max(score, 1.0 - dist / 64)
+        if reasons:
+            a, b = sorted((ri[0], rj[0]))
+            yield a, b, round(score, 3), "+".join(reasons)
+
+
+def _key_pairs(keys: List[list], n_own: int, max_posting: int | None = None) -> set:
+    """
+    같은 키를 하나라도 가진 (j, i) 쌍 (j < i). 자기 구간(앞쪽 n_own 개)끼리와
+    자기 구간 × 다음 구간 쌍만 — 다음 구간끼리는 그 구간의 작업이 맡는다
+    """
+    index: Dict[object, List[int]] = {}
+    pairs = set()
+    for i, ks in enumerate(keys):
+        found = set()
+        for k in ks:
+            members = index.get(k)
+            if members and (max_posting is None or len(members) <= max_posting):
+                found.update(members)
+        pairs.update((j, i) for j in found)
+        if i < n_own:
+            for k in ks:
+                index.setdefault(k, []).append(i)
+    return pairs
+
+
+# ─── 전체 작업 ──────────────────────────────
+def find_duplicates(conn, threshold: float = NAME_THRESHOLD, images: bool = False,
+                    workers: int | None = None) -> List[DuplicateGroup]:
+    """
+    후보 그룹 목록 (큰 그룹, 높은 유사도 순).
+    workers: 프로세스 수 (기본 CPU 수, 1 이면 현재 프로세스에서)
+    """
+    if images and Image is None:
+        raise ValueError("이미지 비교에는 Pillow 가 필요합니다 (pip install Pillow)")
+    blocks = _load_blocks(conn)
+    workers = workers or os.cpu_count() or 1
+    pairs: List[Pair] = []
+    if workers == 1:
+        for task in _tasks(blocks):
+            pairs.extend(compare_units(task, threshold, images))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(compare_units, task, threshold, images) for task in _tasks(blocks)]
+            for f in futures:
+                pairs.extend(f.result())
+    return _group(pairs)
+
+
+def _group(pairs: List[Pair]) -> List[DuplicateGroup]:
+    parent: Dict[int, int] = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b, _, _ in pairs:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    groups: Dict[int, DuplicateGroup] = {}
+    for p in sorted(pairs):
+        g = groups.setdefault(find(p[0]), DuplicateGroup(ids=[]))
+        g.pairs.append(p)
+    for root, g in groups.items():
+        g.ids = sorted({i for p in g.pairs for i in p[:2]})
+    return sorted(groups.values(), key=lambda g: (-len(g.ids), -g.best_score, g.ids[0]))
@@ -1,13 +1,14 @@
 import sys, json
 from pathlib import Path
 from typing import Dict
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QPixmap, QIcon, QFont
+from PyQt5.QtCore import Qt, QSize, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QPixmap, QIcon, QFont, QKeySequence
 # from PyQt5.QtWidgets ... (unchanged)
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QLabel, QPushButton,
     QFileDialog, QLineEdit, QMessageBox, QDialog, QFormLayout, QSpinBox, QDoubleSpinBox, QTextEdit, QComboBox,
-    QTabWidget, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QCheckBox, QSizePolicy, QAbstractSpinBox
+    QTabWidget, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QCheckBox, QSizePolicy, QAbstractSpinBox,
+    QTreeWidget, QTreeWidgetItem, QShortcut
 )
 # Additional imports for DetailDialog
 from .models import Product
@@ -72,10 +73,29 @@ class DetailDialog(QDialog):
         main_layout.addWidget(btn_ok, alignment=Qt.AlignBottom)
 # Ensure QApplication is imported for combo box style setting
 from PyQt5.QtWidgets import QApplication
-from .db import DataManager
+from .db import DataManager, changed_fields
+from .backup import BackupManager
 from .models import Product
 from functools import partial 
 
+AUTO_BACKUP_MINUTES = 60    # 자동 백업 주기
+BACKUP_KEEP = 48            # 보존할 스냅숏 수
+PAGE_SIZE = 500             # 목록/이미지 탭에 한 번에 불러오는 행 수 (스크롤 끝에서 다음 페이지)
+
+# 목록 탭 열 번호 → 정렬 컬럼 (이미지·버튼 열은 정렬 없음)
+TABLE_SORT_COLUMNS = {
+    0: "id", 2: "category", 3: "supplier_name", 4: "supplier_item_no", 5: "product_code",
+    6: "karat", 7: "weight_g", 8: "size", 9: "total_qb_qty", 10: "labor_cost1",
+    11: "labor_cost2", 12: "set_no", 13: "discontinued", 14: "stock_qty", 15: "is_favorite",
+}
+# 그룹 탭 기준 (표시 이름, 컬럼)
+GROUP_CHOICES = [("매입처", "supplier_name"), ("세트번호", "set_no"), ("품목", "category")]
+
+class _BackupSignals(QObject):
+    """백업 스레드 → GUI 스레드 알림 (시그널은 메인 스레드에서 처리됨)"""
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
 class ProductDialog(QDialog):
     def __init__(self, parent=None, product: Product | None = None):
         super().__init__(parent)
@@ -97,8 +117,7 @@ class ProductDialog(QDialog):
         self.karat_cb.addItems(["14K","18K","24K"])
         self.weight_spin = QDoubleSpinBox(); self.weight_spin.setMaximum(100000); self.weight_spin.setSuffix(" g")
         self.size_edit = QLineEdit()
-        self.qb_edit = QLineEdit()
-        self.qb_edit.setPlaceholderText("총QB수량")
+        self.qb_spin = QSpinBox(); self.qb_spin.setMaximum(1_000_000)
 
         self.labor1_spin = QDoubleSpinBox(); self.labor1_spin.setMaximum(1_000_000_000); self.labor1_spin.setPrefix("₩ ")
         self.labor2_spin = QDoubleSpinBox(); self.labor2_spin.setMaximum(1_000_000_000); self.labor2_spin.setPrefix("₩ ")
@@ -125,7 +144,7 @@ class ProductDialog(QDialog):
         layout.addRow("함량", self.karat_cb)
         layout.addRow("중량", self.weight_spin)
         layout.addRow("사이즈", self.size_edit)
-        layout.addRow("총QB수량", self.qb_edit)
+        layout.addRow("총QB수량", self.qb_spin)
         layout.addRow("기본공임1", self.labor1_spin)
         layout.addRow("물림(추가공임)", self.labor2_spin)
         layout.addRow("세트번호", self.set_no_edit)
@@ -154,7 +173,7 @@ class ProductDialog(QDialog):
         self.karat_cb.setCurrentText(p.karat)
         self.weight_spin.setValue(p.weight_g)
         self.size_edit.setText(p.size)
-        self.qb_edit.setText(str(p.total_qb_qty))
+        self.qb_spin.setValue(int(p.total_qb_qty or 0))
         self.labor1_spin.setValue(p.labor_cost1)
         self.labor2_spin.setValue(p.labor_cost2)
         self.set_no_edit.setText(p.set_no)
@@ -186,14 +205,14 @@ class ProductDialog(QDialog):
             karat=self.karat_cb.currentText(),
             weight_g=self.weight_spin.value(),
             size=self.size_edit.text().strip(),
-            total_qb_qty=self.qb_edit.text().strip(),
+            total_qb_qty=self.qb_spin.value(),
             labor_cost1=self.labor1_spin.value(),
             labor_cost2=self.labor2_spin.value(),
             set_no=self.set_no_edit.text().strip(),
             discontinued=self.discontinued_cb.currentText()=="Y",
             stock_qty=self.stock_spin.value(),
             image_path=self.img_path_edit.text().strip(),
-            extra_images=[],
+            extra_images=self.product.extra_images if self.product else [],
             notes=self.notes_edit.toPlainText(),
             is_favorite=self.favorite_chk.isChecked()
         )
@@ -205,10 +224,51 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("GOLD MANAGER")
         self.resize(1200,700)
         self.data = DataManager()
+        self.data.warm_code_index()   # 바코드 스캔용 상품번호 → id 맵
+        self._scan_dlg = None
         self.IMAGE_MAX = 200  # max width/height for image cells
+        self.products = []
+        self._cur_filters = {}      # 마지막 조회 조건 (다음 페이지 / 그룹 탭에서 재사용)
+        self._cursor = None         # 다음 keyset 페이지 커서 (None: 끝)
+        self._loading = False
+        self._sort_section = None
         self._build_ui()
+        self._init_backup()
         self.load_products()
 
+    def _init_backup(self):
+        """백그라운드 온라인 백업 (UI 는 멈추지 않음) + 주기적 자동 백업"""
+        self.backup = BackupManager(self.data.db_path,
+                                    self.data.db_path.resolve().parent / "backups",
+                                    keep=BACKUP_KEEP, compress=True)
+        self._backup_signals = _BackupSignals()
+        self._backup_signals.finished.connect(
+            lambda path: self.statusBar().showMessage(f"백업 완료: {Path(path).name}", 5000))
+        self._backup_signals.failed.connect(
+            lambda msg: QMessageBox.warning(self, "백업 실패", msg))
+        self._backup_signals.finished.connect(lambda _: self.backup_btn.setEnabled(True))
+        self._backup_signals.failed.connect(lambda _: self.backup_btn.setEnabled(True))
+        self._backup_running = False
+        self._backup_timer = QTimer(self)
+        self._backup_timer.timeout.connect(self._start_backup)
+        self._backup_timer.start(AUTO_BACKUP_MINUTES * 60 * 1000)
+
+    def _start_backup(self):
+        if self._backup_running:
+            return
+        self._backup_running = True
+        self.backup_btn.setEnabled(False)
+        self.statusBar().showMessage("백업 중…")
+
+        def _done(path):
+            self._backup_running = False
+            self._backup_signals.finished.emit(str(path))
+
+        def _error(e):
+            self._backup_running = False
+            self._backup_signals.failed.emit(str(e))
+        self.backup.start_backup(on_done=_done, on_error=_error)
+
     def _init_icons(self):
         from PyQt5.QtCore import Qt
         icon_dir = Path(__file__).parent / "icons"
@@ -271,6 +331,27 @@ class MainWindow(QMainWindow):
         # Removed setStyle(QApplication.style()) to allow stylesheet to apply
         self.f_widgets["discontinued"]=disc_cb; search_h.addWidget(disc_cb)
 
+        karat_cb = QComboBox(); karat_cb.addItems(["","14K","18K","24K"])
+        karat_cb.setEditable(True)
+        karat_cb.lineEdit().setReadOnly(True)
+        karat_cb.lineEdit().setPlaceholderText("함량")
+        karat_cb.setFixedWidth(80)
+        karat_cb.setToolTip("함량")
+        self.f_widgets["karat"]=karat_cb; search_h.addWidget(karat_cb)
+
+        # 범위 필터: 최솟값(=0)은 '제한 없음'으로 표시되고 필터에서 빠짐
+        self.range_widgets: Dict[str, tuple] = {}
+        w_min = QDoubleSpinBox(); w_min.setMaximum(100000); w_min.setSuffix(" g"); w_min.setSpecialValueText("중량 ≥")
+        w_max = QDoubleSpinBox(); w_max.setMaximum(100000); w_max.setSuffix(" g"); w_max.setSpecialValueText("중량 ≤")
+        for w in (w_min, w_max):
+            w.setFixedWidth(100); w.setButtonSymbols(QAbstractSpinBox.NoButtons); search_h.addWidget(w)
+        self.range_widgets["weight_g"] = (w_min, w_max)
+        l_max = QDoubleSpinBox(); l_max.setMaximum(1_000_000_000); l_max.setDecimals(0); l_max.setPrefix("₩ ")
+        l_max.setSpecialValueText("공임 ≤"); l_max.setFixedWidth(110); l_max.setButtonSymbols(QAbstractSpinBox.NoButtons)
+        search_h.addWidget(l_max)
+        self.range_widgets["labor_cost1"] = (None, l_max)
+        self.in_stock_chk = QCheckBox("재고 있음"); search_h.addWidget(self.in_stock_chk)
+
         search_btn = QPushButton("검색"); search_btn.clicked.connect(lambda: self.load_products(self._filters())); search_h.addWidget(search_btn)
         reset_btn = QPushButton("메인으로"); reset_btn.clicked.connect(self._show_all); search_h.addWidget(reset_btn) 
         
@@ -450,17 +531,80 @@ class MainWindow(QMainWindow):
         self.table.cellClicked.connect(self._table_click)
         self.table.itemDoubleClicked.connect(self._row_dbl_clicked)
         self._apply_column_widths()
+        # 헤더 클릭 → DB 에서 다시 정렬 (QTableWidget 자체 정렬은 쓰지 않음)
+        self.order_by = None                      # None: 즐겨찾기 우선, 최신순
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(False)
+        header.sectionClicked.connect(self._header_clicked)
         self.tabs.addTab(self.table, "목록")
 
+        # 스크롤이 끝에 닿으면 다음 페이지
+        self.table.verticalScrollBar().valueChanged.connect(self._scrolled)
+        self.image_list.verticalScrollBar().valueChanged.connect(self._scrolled)
+
+        # 그룹 탭: 그룹 머리글(개수는 SQL 집계) + 펼칠 때 구성 상품 조회
+        group_w = QWidget(); group_v = QVBoxLayout(group_w)
+        group_h = QHBoxLayout()
+        group_h.addWidget(QLabel("그룹 기준"))
+        self.group_cb = QComboBox()
+        for label, col in GROUP_CHOICES:
+            self.group_cb.addItem(label, col)
+        self.group_cb.currentIndexChanged.connect(lambda _: self._load_groups())
+        group_h.addWidget(self.group_cb); group_h.addStretch()
+        group_v.addLayout(group_h)
+        self.group_tree = QTreeWidget()
+        self.group_tree.setHeaderLabels(["그룹 / 상품", "함량", "중량(g)", "기본공임", "재고"])
+        self.group_tree.setColumnWidth(0, 320)
+        self.group_tree.itemExpanded.connect(self._group_expanded)
+        self.group_tree.itemDoubleClicked.connect(self._group_dbl_clicked)
+        group_v.addWidget(self.group_tree)
+        self.tabs.addTab(group_w, "그룹")
+
+        # 세트 탭: 세트 목록(집계는 set_summary 캐시) + 선택한 세트의 구성 상품
+        set_w = QWidget(); set_v = QVBoxLayout(set_w)
+        set_h = QHBoxLayout()
+        self.set_search = QLineEdit(); self.set_search.setPlaceholderText("세트번호")
+        self.set_search.setFixedWidth(160)
+        self.set_search.returnPressed.connect(self._load_sets)
+        set_h.addWidget(self.set_search)
+        set_btn = QPushButton("세트 검색"); set_btn.clicked.connect(self._load_sets); set_h.addWidget(set_btn)
+        set_h.addStretch()
+        set_v.addLayout(set_h)
+        self.set_table = QTableWidget(0, 5)
+        self.set_table.setHorizontalHeaderLabels(["세트번호", "구성", "총중량(g)", "총공임", "판매 가능 세트"])
+        self.set_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.set_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.set_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.set_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.set_table.itemSelectionChanged.connect(self._set_selected)
+        set_v.addWidget(self.set_table)
+        self.set_members = QTableWidget(0, 6)
+        self.set_members.setHorizontalHeaderLabels(["품목", "상품명", "함량", "중량(g)", "공임", "재고"])
+        self.set_members.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.set_members.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.set_members.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.set_members.itemDoubleClicked.connect(
+            lambda it: self._popup(self.set_members.item(it.row(), 0).data(Qt.UserRole)))
+        set_v.addWidget(self.set_members)
+        self.tabs.addTab(set_w, "세트")
+        self.tabs.currentChanged.connect(self._tab_changed)
+
         vbox.addWidget(self.tabs)
 
         # action buttons
         btn_h = QHBoxLayout()
+        # 바코드 스캔: 스캐너가 상품번호 + Enter 를 입력하면 바로 상세 창 (F2 로 포커스)
+        self.scan_edit = QLineEdit(); self.scan_edit.setPlaceholderText("바코드 스캔 (F2)")
+        self.scan_edit.setFixedWidth(200)
+        self.scan_edit.returnPressed.connect(self._scan)
+        btn_h.addWidget(self.scan_edit)
+        QShortcut(QKeySequence("F2"), self, activated=self.scan_edit.setFocus)
         add_b = QPushButton("추가"); add_b.clicked.connect(self._add); btn_h.addWidget(add_b)
         #edit_b = QPushButton("수정"); edit_b.clicked.connect(self._edit); btn_h.addWidget(edit_b)
         del_b = QPushButton("삭제"); del_b.clicked.connect(self._delete); btn_h.addWidget(del_b)
         #fav_b = QPushButton("즐겨찾기 전환"); fav_b.clicked.connect(self._toggle_fav); btn_h.addWidget(fav_b)
         btn_fav_only = QPushButton("즐겨찾기 보기"); btn_fav_only.clicked.connect(self._show_favs); btn_h.addWidget(btn_fav_only)
+        self.backup_btn = QPushButton("백업"); self.backup_btn.clicked.connect(self._start_backup); btn_h.addWidget(self.backup_btn)
 
         vbox.addLayout(btn_h)
 
@@ -475,20 +619,115 @@ class MainWindow(QMainWindow):
             val = val.strip()
             if val:                       # 빈 값 제거
                 d[k] = val
+        # 범위 위젯 → "컬럼__between" (SQL 에서 BETWEEN / >= / <= 로 변환됨)
+        for col, (lo_w, hi_w) in self.range_widgets.items():
+            lo = lo_w.value() if lo_w and lo_w.value() > lo_w.minimum() else None
+            hi = hi_w.value() if hi_w and hi_w.value() > hi_w.minimum() else None
+            if lo is not None or hi is not None:
+                d[f"{col}__between"] = (lo if lo is not None else "", hi if hi is not None else "")
+        if self.in_stock_chk.isChecked():
+            d["stock_qty__gt"] = 0
         return d
 
-    def load_products(self, filters: dict | None = None):
+    def load_products(self, filters: dict | None = None, keep_position: bool = False):
+        """
+        첫 페이지부터 다시 조회. keep_position=True 면 (수정/즐겨찾기 후 새로고침)
+        지금까지 불러온 만큼 다시 읽고 선택 행과 스크롤 위치를 되돌린다.
+        """
+        if filters is None:                # ★ 추가
+            filters = self._cur_filters if keep_position else self._filters()
+        self._cur_filters = filters
+
+        limit = PAGE_SIZE
+        selected = scroll_t = scroll_i = None
+        if keep_position and self.products:
+            limit = max(PAGE_SIZE, len(self.products))
+            selected = self._current_id()
+            scroll_t = self.table.verticalScrollBar().value()
+            scroll_i = self.image_list.verticalScrollBar().value()
+
+        self._loading = True
+        try:
+            self.products = []
+            self.image_list.clear()
+            self.table.clear()
+            headers = [
+                "ID","이미지","품목","매입처","매입처상품번호","상품번호","함량","중량(g)","사이즈",
+                "총QB수량","기본공임","물림(추가공임)","세트번호","단종","재고",
+                "즐겨찾기","수정"
+            ]
+            self.table.setColumnCount(len(headers))
+            self.table.setHorizontalHeaderLabels(headers)
+            self.table.setRowCount(0)
+
+            page, self._cursor = self.data.search_page(filters, after=None, limit=limit,
+                                                       order_by=self.order_by)
+            self._append_rows(page)
+            self.table.resizeColumnsToContents()
+            self._apply_column_widths()
+            self.table.setColumnHidden(0, True)
+
+            if selected is not None:
+                self._select_id(selected)
+            if scroll_t is not None:
+                self.table.verticalScrollBar().setValue(scroll_t)
+                self.image_list.verticalScrollBar().setValue(scroll_i)
+        finally:
+            self._loading = False
+        self._load_groups()
+        if self.tabs.currentIndex() == 3:
+            self._load_sets()
+
+    def _load_more(self):
+        """다음 keyset 페이지를 이어 붙임"""
+        if self._cursor is None:
+            return
+        self._loading = True
+        try:
+            page, self._cursor = self.data.search_page(self._cur_filters, after=self._cursor,
+                                                       limit=PAGE_SIZE, order_by=self.order_by)
+            self._append_rows(page)
+        finally:
+            self._loading = False
+
+    def _scrolled(self, value: int):
+        bar = self.sender()
+        if not self._loading and self._cursor is not None and value >= bar.maximum():
+            self._load_more()
+
+    def _header_clicked(self, col: int):
+        """같은 열을 다시 누르면 오름/내림 전환. 정렬은 DB 가 인덱스로 처리"""
+        header = self.table.horizontalHeader()
+        db_col = TABLE_SORT_COLUMNS.get(col)
+        if db_col is None:
+            # 이미지·버튼 열: 헤더가 바꿔 놓은 표시를 현재 정렬로 되돌림
+            if self.order_by is None:
+                header.setSortIndicatorShown(False)
+            else:
+                header.setSortIndicator(self._sort_section, self._sort_qt_order())
+            return
+        if self.order_by and self.order_by[0] == db_col:
+            direction = "desc" if self.order_by[1] == "asc" else "asc"
+        else:
+            direction = "asc"
+        self.order_by = (db_col, direction)
+        self._sort_section = col
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(col, self._sort_qt_order())
+        self.load_products(self._cur_filters)
+
+    def _sort_qt_order(self):
+        return Qt.AscendingOrder if self.order_by[1] == "asc" else Qt.DescendingOrder
+
+    def _append_rows(self, products):
         import locale
         locale.setlocale(locale.LC_ALL, '')  # 숫자 콤마 표시용
 
-        if filters is None:                # ★ 추가
-            filters = self._filters()
-
-        self.products = self.data.search_products(filters)
+        start = len(self.products)
+        self.products.extend(products)
 
         # ---------- 이미지 탭 ----------
-        self.image_list.clear()
-        for p in self.products:
+        for p in products:
             item = QListWidgetItem()
             pix = QPixmap(p.image_path) if p.image_path and Path(p.image_path).exists() else QPixmap()
             item.setIcon(QIcon(pix.scaled(180, 180, Qt.KeepAspectRatio, Qt.SmoothTransformation)))
@@ -502,21 +741,13 @@ class MainWindow(QMainWindow):
             self.image_list.addItem(item)
 
         # ---------- 목록 탭 ----------
-        self.table.clear()
-        headers = [
-            "ID","이미지","품목","매입처","매입처상품번호","상품번호","함량","중량(g)","사이즈",
-            "총QB수량","기본공임","물림(추가공임)","세트번호","단종","재고",
-            "즐겨찾기","수정"
-        ]
-        self.table.setColumnCount(len(headers))
-        self.table.setHorizontalHeaderLabels(headers)
         self.table.setRowCount(len(self.products))
 
         # Determine dynamic column indices for favorite and edit buttons
         fav_col = self.table.columnCount() - 2
         edit_col = self.table.columnCount() - 1
 
-        for row, p in enumerate(self.products):
+        for row, p in enumerate(products, start):
             category_map = {"E": "귀걸이", "R": "반지", "N": "목걸이", "B": "팔찌", "O": "기타"}
             category_kor = category_map.get(p.category, p.category)
             # ─── 0~14번 일반 데이터 셀 ───────────────
@@ -529,7 +760,7 @@ class MainWindow(QMainWindow):
                 p.karat,                               # 함량
                 p.weight_g,                            # 중량(g)
                 p.size,                                # 사이즈
-                p.total_qb_qty,                        # 총QB수량 (now string, no formatting)
+                p.total_qb_qty,                        # 총QB수량
                 locale.format_string("%d", p.labor_cost1, grouping=True),  # 기본공임1
                 locale.format_string("%d", p.labor_cost2, grouping=True),  # 물림(추가공임)
                 p.set_no,                              # 세트번호
@@ -587,11 +818,6 @@ class MainWindow(QMainWindow):
             self.table.setCellWidget(row, edit_col, self._make_centered_widget(edit_btn))
 
 
-        self.table.resizeColumnsToContents()
-        self._apply_column_widths()
-        self.table.setColumnHidden(0, True)
-
-
     def _show_popup(self,item):
         pid=item.data(Qt.UserRole); self._popup(pid)
 
@@ -602,6 +828,10 @@ class MainWindow(QMainWindow):
                 w.setCurrentIndex(0)
             else:
                 w.clear()
+        for lo_w, hi_w in self.range_widgets.values():
+            for w in (lo_w, hi_w):
+                if w: w.setValue(w.minimum())
+        self.in_stock_chk.setChecked(False)
         self.load_products({})   # 전체 조회
 
     def _show_favs(self):
@@ -641,20 +871,142 @@ class MainWindow(QMainWindow):
         return wrapper
 
 
+    def _select_id(self, pid: int):
+        for row in range(self.table.rowCount()):
+            it = self.table.item(row, 0)
+            if it and it.data(Qt.UserRole) == pid:
+                self.table.selectRow(row)
+                self.image_list.setCurrentRow(row)
+                return
+
+    # 그룹 탭
+    def _load_groups(self):
+        """그룹 머리글만 다시 만든다 (개수/재고 합계는 GROUP BY). 상품은 펼칠 때 조회"""
+        col = self.group_cb.currentData()
+        self.group_tree.clear()
+        for value, count, stock in self.data.group_counts(col, self._cur_filters):
+            label = value if value else "(없음)"
+            top = QTreeWidgetItem([f"{label} ({count}개)", "", "", "", str(stock)])
+            top.setData(0, Qt.UserRole, ("group", col, value, None))
+            top.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            self.group_tree.addTopLevelItem(top)
+
+    def _group_expanded(self, item: QTreeWidgetItem):
+        kind, col, value, _ = item.data(0, Qt.UserRole)
+        if kind == "group" and item.childCount() == 0:
+            self._load_group_page(item, col, value, None)
+
+    def _load_group_page(self, top: QTreeWidgetItem, col: str, value: str, after):
+        page, cursor = self.data.search_page(self._cur_filters, after=after, limit=PAGE_SIZE,
+                                             order_by=self.order_by, group=(col, value))
+        for p in page:
+            child = QTreeWidgetItem([
+                f"{'★ ' if p.is_favorite else ''}{p.name}", p.karat, str(p.weight_g),
+                f"{p.labor_cost1:,.0f}", str(p.stock_qty),
+            ])
+            child.setData(0, Qt.UserRole, ("product", col, value, p.id))
+            top.addChild(child)
+        if cursor is not None:
+            more = QTreeWidgetItem(["더 보기…"])
+            more.setData(0, Qt.UserRole, ("more", col, value, cursor))
+            top.addChild(more)
+
+    def _group_dbl_clicked(self, item: QTreeWidgetItem, _col: int):
+        kind, col, value, extra = item.data(0, Qt.UserRole)
+        if kind == "product":
+            self._popup(extra)
+        elif kind == "more":
+            top = item.parent()
+            top.removeChild(item)
+            self._load_group_page(top, col, value, extra)
+
+    # 세트 탭
+    def _tab_changed(self, index: int):
+        if index == 3:
+            self._load_sets()
+
+    def _load_sets(self):
+        """세트 목록 다시 그림 (선택했던 세트는 유지)"""
+        current = self._current_set_no()
+        sets = self.data.list_sets(self.set_search.text())
+        self.set_table.blockSignals(True)
+        self.set_table.clearSelection()
+        self.set_table.setRowCount(len(sets))
+        for row, st in enumerate(sets):
+            vals = [st.set_no, st.members, f"{st.total_weight_g:.2f}", f"{st.total_labor:,.0f}", st.complete_sets]
+            for col, val in enumerate(vals):
+                self.set_table.setItem(row, col, QTableWidgetItem(str(val)))
+            if st.set_no == current:
+                self.set_table.selectRow(row)
+        self.set_table.blockSignals(False)
+        self._set_selected()
+
+    def _current_set_no(self) -> str | None:
+        row = self.set_table.currentRow()
+        if row < 0 or not self.set_table.selectedItems():
+            return None
+        it = self.set_table.item(row, 0)
+        return it.text() if it else None
+
+    def _set_selected(self):
+        set_no = self._current_set_no()
+        members = self.data.get_set_members(set_no) if set_no else []
+        category_map = {"E": "귀걸이", "R": "반지", "N": "목걸이", "B": "팔찌", "O": "기타"}
+        self.set_members.setRowCount(len(members))
+        for row, p in enumerate(members):
+            vals = [category_map.get(p.category, p.category), p.name, p.karat, p.weight_g,
+                    f"{(p.labor_cost1 or 0) + (p.labor_cost2 or 0):,.0f}", p.stock_qty]
+            for col, val in enumerate(vals):
+                item = QTableWidgetItem(str(val))
+                if col == 0:
+                    item.setData(Qt.UserRole, p.id)
+                self.set_members.setItem(row, col, item)
+
+    # 바코드 스캔
+    def _scan(self):
+        """
+        스캔 한 번 = 상품번호 한 줄. 상세 창은 모달이 아니라서 연속 스캔이 입력창에 계속
+        쌓이고 차례대로 처리된다 (창은 마지막 상품으로 바뀜)
+        """
+        code = self.scan_edit.text().strip()
+        self.scan_edit.clear()
+        if not code:
+            return
+        p = self.data.get_by_code(code)
+        if p is None:
+            QApplication.beep()
+            self.statusBar().showMessage(f"상품번호 없음: {code}", 5000)
+            return
+        self.statusBar().showMessage(f"스캔: {code} → {p.name}", 5000)
+        if self._scan_dlg is not None:
+            self._scan_dlg.close(); self._scan_dlg.deleteLater()
+        self._scan_dlg = DetailDialog(self, p)
+        self._scan_dlg.setModal(False)
+        self._scan_dlg.show()
+        self.activateWindow()
+        self.scan_edit.setFocus()
+
     # CRUD
     def _add(self):
         d=ProductDialog(self); p=d.get_product()
-        if p: self.data.add_product(p); self.load_products()
+        if not p: return
+        try: self.data.add_product(p)
+        except ValueError as e: QMessageBox.warning(self,"추가 실패",str(e)); return
+        self.load_products()
     def _edit(self,pid_override=None):
         pid=pid_override or self._current_id()
         if pid is None: QMessageBox.information(self,"알림","수정할 상품 선택"); return
         p=self.data.get_product(pid); dlg=ProductDialog(self,p); up=dlg.get_product()
-        if up: up.id=pid; self.data.update_product(up); self.load_products()
+        if not up: return
+        up.id=pid
+        try: self.data.update_product(up, changed_fields(p, up))   # 바뀐 컬럼만 저장
+        except ValueError as e: QMessageBox.warning(self,"수정 실패",str(e)); return
+        self.load_products(keep_position=True)
     def _delete(self):
         pid=self._current_id()
         if pid is None: QMessageBox.information(self,"알림","삭제할 상품 선택"); return
         if QMessageBox.question(self,"확인","정말 삭제?")==QMessageBox.Yes:
-            self.data.delete_product(pid); self.load_products()
+            self.data.delete_product(pid); self.load_products(keep_position=True)
     def _toggle_fav(self):
         pid = self._current_id()
         if pid is None:
@@ -662,15 +1014,22 @@ class MainWindow(QMainWindow):
             return
     
         self.data.toggle_favorite(pid)
-        self.load_products()
+        self.load_products(keep_position=True)
 
     def _toggle_fav_cell(self, pid: int):
         self.data.toggle_favorite(pid)
-        self.load_products()          # 버튼·별 아이콘 새로고침
+        self.load_products(keep_position=True)          # 버튼·별 아이콘 새로고침
 
     def _current_id(self):
         if self.tabs.currentIndex()==0:
             it=self.image_list.currentItem(); return it.data(Qt.UserRole) if it else None
+        elif self.tabs.currentIndex()==2:
+            it=self.group_tree.currentItem()
+            data=it.data(0, Qt.UserRole) if it else None
+            return data[3] if data and data[0]=="product" else None
+        elif self.tabs.currentIndex()==3:
+            row=self.set_members.currentRow()
+            return self.set_members.item(row,0).data(Qt.UserRole) if row>=0 else None
         else:
             row=self.table.currentRow(); return int(self.table.item(row,0).data(Qt.UserRole)) if row>=0 else None
 
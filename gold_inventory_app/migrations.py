@@ -0,0 +1,359 @@
+"""
+스키마 마이그레이션 (PRAGMA user_version 으로 버전 관리)
+
+DataManager 가 열릴 때 migrate() 가 아직 적용되지 않은 단계를 순서대로 실행한다.
+큰 DB 에서도 오래 잠그지 않도록 행 복사는 BATCH_SIZE 단위로 나눠 커밋하고,
+진행 위치를 schema_migration_progress 에 남기므로 중간에 끊겨도 다음 실행 때 이어서 한다.
+
+  1  기존(ad hoc) products 테이블
+  2  extra_images(JSON 문자열) → product_images 자식 테이블
+  3  products 재구성: total_qb_qty 정수, extra_images 컬럼 제거, created_at / updated_at 추가
+  4  범위 / IN 필터용 인덱스
+  5  정렬 / 그룹 보기용 인덱스
+  6  세트 집계 캐시(set_summary) + 구성 상품 변경 시 캐시를 지우는 트리거
+  7  상품번호(바코드) 유일 인덱스 — 이미 중복된 번호는 먼저 등록된 상품만 남기고 비고로 옮김
+  8  금 시세(gold_prices) + 재고 순금 중량 변동 기록(stock_moves) 트리거
+
+새 단계는 MIGRATIONS 끝에 추가한다. 이미 배포된 단계는 고치지 않는다.
+"""
+import sqlite3
+from typing import Callable, List, Tuple
+
+BATCH_SIZE = 5000
+
+# 상품의 추가 이미지 목록(JSON 배열) — SELECT 절에서 extra_images 컬럼 대신 사용
+EXTRA_IMAGES_SQL = ("(SELECT json_group_array(path) FROM "
+                    "(SELECT path FROM product_images WHERE product_id = p.id ORDER BY position))")
+
+# 함량 → 순도 ({k} 자리에 컬럼). 그 밖의 "10K" 같은 값은 숫자/24
+PURITY_SQL = ("CASE upper(trim({k})) WHEN '14K' THEN 0.585 WHEN '18K' THEN 0.75 WHEN '24K' THEN 0.999 "
+              "ELSE COALESCE(CAST(rtrim(upper(trim({k})), 'K') AS REAL), 0) / 24.0 END")
+
+
+def _v1_baseline(conn: sqlite3.Connection, batch_size: int):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT,
+            name TEXT NOT NULL,
+            supplier_name TEXT,
+            supplier_item_no TEXT,
+            product_code TEXT,
+            karat TEXT,
+            weight_g REAL,
+            size TEXT,
+            total_qb_qty TEXT,
+            labor_cost1 REAL,
+            labor_cost2 REAL,
+            set_no TEXT,
+            discontinued INTEGER DEFAULT 0,
+            stock_qty INTEGER,
+            image_path TEXT,
+            extra_images TEXT,
+            notes TEXT,
+            is_favorite INTEGER DEFAULT 0
+        )
+    """)
+
+
+def _v2_product_images(conn: sqlite3.Connection, batch_size: int):
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_images (
+                product_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                PRIMARY KEY (product_id, position)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_products_delete_images
+            AFTER DELETE ON products
+            BEGIN
+                DELETE FROM product_images WHERE product_id = OLD.id;
+            END
+        """)
+
+    def copy(last_id: int) -> int | None:
+        ids = [r[0] for r in conn.execute(
+            "SELECT id FROM products WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))]
+        if not ids:
+            return None
+        conn.execute("""
+            INSERT OR IGNORE INTO product_images (product_id, position, path)
+            SELECT p.id, j.key, j.value
+            FROM products p, json_each(CASE WHEN json_valid(p.extra_images)
+                                            THEN p.extra_images ELSE '[]' END) j
+            WHERE p.id > ? AND p.id <= ? AND j.type = 'text' AND j.value <> ''
+        """, (last_id, ids[-1]))
+        return ids[-1]
+    _run_batches(conn, 2, copy)
+
+
+_V3_COLUMNS = ("id", "category", "name", "supplier_name", "supplier_item_no", "product_code",
+               "karat", "weight_g", "size", "total_qb_qty", "labor_cost1", "labor_cost2",
+               "set_no", "discontinued", "stock_qty", "image_path", "notes", "is_favorite")
+
+# 숫자가 아닌 총QB수량은 버리지 않고 비고 끝에 남김
+_QB_IS_INT = "(trim(total_qb_qty) <> '' AND trim(total_qb_qty) NOT GLOB '*[^0-9]*')"
+_QB_IS_BLANK = "(total_qb_qty IS NULL OR trim(total_qb_qty) = '')"
+
+
+def _v3_rebuild_products(conn: sqlite3.Connection, batch_size: int):
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS products_v3 (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT,
+                name TEXT NOT NULL,
+                supplier_name TEXT,
+                supplier_item_no TEXT,
+                product_code TEXT,
+                karat TEXT,
+                weight_g REAL,
+                size TEXT,
+                total_qb_qty INTEGER NOT NULL DEFAULT 0,
+                labor_cost1 REAL,
+                labor_cost2 REAL,
+                set_no TEXT,
+                discontinued INTEGER DEFAULT 0,
+                stock_qty INTEGER,
+                image_path TEXT,
+                notes TEXT,
+                is_favorite INTEGER DEFAULT 0,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    select_cols = []
+    for c in _V3_COLUMNS:
+        if c == "total_qb_qty":
+            select_cols.append(f"CASE WHEN {_QB_IS_INT} THEN CAST(trim(total_qb_qty) AS INTEGER) ELSE 0 END")
+        elif c == "notes":
+            select_cols.append(
+                f"CASE WHEN {_QB_IS_INT} OR {_QB_IS_BLANK} THEN notes "
+                f"ELSE COALESCE(notes, '') || char(10) || '총QB수량: ' || total_qb_qty END")
+        else:
+            select_cols.append(c)
+
+    def copy(last_id: int) -> int | None:
+        last = conn.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM products WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size)).fetchone()[0]
+        if last is None:
+            return None
+        conn.execute(
+            f"INSERT OR REPLACE INTO products_v3 ({','.join(_V3_COLUMNS)}) "
+            f"SELECT {','.join(select_cols)} FROM products WHERE id > ? AND id <= ?",
+            (last_id, last))
+        return last
+    _run_batches(conn, 3, copy)
+
+    # 교체: 한 트랜잭션 (DDL 은 암묵적 트랜잭션을 열지 않으므로 BEGIN 을 직접).
+    # AUTOINCREMENT 시퀀스를 이어받아 삭제된 id 가 재사용되지 않게 함
+    conn.execute("BEGIN")
+    with conn:
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'products'").fetchone()
+        conn.execute("DROP TABLE products")
+        conn.execute("ALTER TABLE products_v3 RENAME TO products")
+        if seq is not None:
+            conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'products'",
+                         (seq[0],))
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_products_delete_images
+            AFTER DELETE ON products
+            BEGIN
+                DELETE FROM product_images WHERE product_id = OLD.id;
+            END
+        """)
+        conn.execute("DELETE FROM schema_migration_progress WHERE version = 3")
+        conn.execute("PRAGMA user_version = 3")
+
+
+def _v4_filter_indexes(conn: sqlite3.Connection, batch_size: int):
+    # 품목/함량 일치 + 중량 범위, 함량 + 중량 범위, 재고 조건
+    with conn:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_products_cat_karat_weight "
+                     "ON products (category, karat, weight_g)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_products_karat_weight "
+                     "ON products (karat, weight_g)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_products_stock ON products (stock_qty)")
+        conn.execute("ANALYZE products")
+
+
+def _v5_sort_indexes(conn: sqlite3.Connection, batch_size: int):
+    # SQLite 인덱스는 rowid(id)를 끝에 포함하므로 (컬럼) 인덱스가 곧 ORDER BY 컬럼, id 와
+    # keyset 조건 (컬럼, id) > (?, ?) 를 그대로 덮는다. GROUP BY 매입처/세트번호도 같은 인덱스 사용
+    with conn:
+        for col in ("is_favorite", "name", "weight_g", "labor_cost1", "supplier_name", "set_no"):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_products_{col} ON products ({col})")
+        conn.execute("ANALYZE products")
+
+
+def _v6_set_summary(conn: sqlite3.Connection, batch_size: int):
+    # 세트번호별 집계 캐시. 행이 없으면 DataManager 가 다시 계산해서 채운다.
+    # 구성 상품의 세트번호/중량/공임/재고가 바뀌면 (어느 연결에서 쓰든) 트리거가 해당 세트 행을 지움
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS set_summary (
+                set_no TEXT PRIMARY KEY,
+                members INTEGER NOT NULL,
+                total_weight_g REAL NOT NULL,
+                total_labor REAL NOT NULL,
+                complete_sets INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_set_summary_insert
+            AFTER INSERT ON products WHEN NEW.set_no <> ''
+            BEGIN
+                DELETE FROM set_summary WHERE set_no = NEW.set_no;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_set_summary_update
+            AFTER UPDATE OF set_no, weight_g, labor_cost1, labor_cost2, stock_qty ON products
+            WHEN OLD.set_no <> '' OR NEW.set_no <> ''
+            BEGIN
+                DELETE FROM set_summary WHERE set_no IN (OLD.set_no, NEW.set_no);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_set_summary_delete
+            AFTER DELETE ON products WHEN OLD.set_no <> ''
+            BEGIN
+                DELETE FROM set_summary WHERE set_no = OLD.set_no;
+            END
+        """)
+
+
+def _v7_unique_product_code(conn: sqlite3.Connection, batch_size: int):
+    # 빈 상품번호는 여러 상품이 가질 수 있도록 부분 인덱스.
+    # 조회 쪽은 인덱스를 타도록 WHERE product_code = ? AND product_code <> '' 로 쓴다
+    with conn:
+        conn.execute("UPDATE products SET product_code = trim(product_code) "
+                     "WHERE product_code <> trim(product_code)")
+        conn.execute("""
+            UPDATE products
+            SET notes = COALESCE(notes, '') || char(10) || '중복 상품번호: ' || product_code,
+                product_code = ''
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY product_code ORDER BY id) AS rn
+                    FROM products WHERE product_code <> ''
+                ) WHERE rn > 1
+            )
+        """)
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_products_code "
+                     "ON products (product_code) WHERE product_code <> ''")
+
+
+_FINE_SQL = "(COALESCE({r}.stock_qty, 0) * COALESCE({r}.weight_g, 0) * " + PURITY_SQL.format(k="{r}.karat") + ")"
+
+
+def _v8_prices_and_stock_moves(conn: sqlite3.Connection, batch_size: int):
+    # 날짜별 순금 1g 시세. day 는 'YYYY-MM-DD' 라 기본키 범위 조회가 곧 날짜 범위
+    # stock_moves 는 재고 순금 중량(수량 × 중량 × 순도)이 바뀔 때마다 그 차이를 날짜와 함께 남긴다.
+    # 지금 보유량에서 그 날 이후의 변동을 빼면 과거 어느 날의 보유량이 나온다 (기록 시작 전은 시작 시점 값)
+    new_fine, old_fine = _FINE_SQL.format(r="NEW"), _FINE_SQL.format(r="OLD")
+    today = "date('now', 'localtime')"
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS gold_prices (
+                day TEXT PRIMARY KEY,
+                price_per_g REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stock_moves (
+                id INTEGER PRIMARY KEY,
+                day TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                qty_delta INTEGER NOT NULL,
+                fine_g_delta REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_stock_moves_day ON stock_moves (day)")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stock_moves_insert
+            AFTER INSERT ON products WHEN {new_fine} <> 0
+            BEGIN
+                INSERT INTO stock_moves (day, product_id, qty_delta, fine_g_delta)
+                VALUES ({today}, NEW.id, COALESCE(NEW.stock_qty, 0), {new_fine});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stock_moves_update
+            AFTER UPDATE OF stock_qty, weight_g, karat ON products WHEN {new_fine} <> {old_fine}
+            BEGIN
+                INSERT INTO stock_moves (day, product_id, qty_delta, fine_g_delta)
+                VALUES ({today}, NEW.id, COALESCE(NEW.stock_qty, 0) - COALESCE(OLD.stock_qty, 0),
+                        {new_fine} - {old_fine});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stock_moves_delete
+            AFTER DELETE ON products WHEN {old_fine} <> 0
+            BEGIN
+                INSERT INTO stock_moves (day, product_id, qty_delta, fine_g_delta)
+                VALUES ({today}, OLD.id, -COALESCE(OLD.stock_qty, 0), -{old_fine});
+            END
+        """)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection, int], None]]] = [
+    (1, "baseline products table", _v1_baseline),
+    (2, "extra_images → product_images", _v2_product_images),
+    (3, "rebuild products with typed columns and timestamps", _v3_rebuild_products),
+    (4, "indexes for range / IN filters", _v4_filter_indexes),
+    (5, "indexes for server-side sorting and grouping", _v5_sort_indexes),
+    (6, "cached set aggregates", _v6_set_summary),
+    (7, "unique product_code for barcode lookup", _v7_unique_product_code),
+    (8, "gold price history and stock movement log", _v8_prices_and_stock_moves),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, batch_size: int = BATCH_SIZE,
+            progress: Callable[[int, str], None] | None = None) -> int:
+    """미적용 마이그레이션을 순서대로 실행하고 최종 버전을 반환"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migration_progress (
+            version INTEGER PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    """)
+    conn.commit()
+    version = current_version(conn)
+    for target, description, func in MIGRATIONS:
+        if target <= version:
+            continue
+        if progress:
+            progress(target, description)
+        func(conn, batch_size)
+        with conn:
+            conn.execute("DELETE FROM schema_migration_progress WHERE version = ?", (target,))
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+        version = target
+    return version
+
+
+def _run_batches(conn: sqlite3.Connection, version: int, step: Callable[[int], int | None]):
+    """step(last_id) → 새 last_id (끝이면 None). 배치마다 진행 위치와 함께 커밋"""
+    row = conn.execute("SELECT last_id FROM schema_migration_progress WHERE version = ?",
+                       (version,)).fetchone()
+    last_id = row[0] if row else 0
+    while True:
+        with conn:
+            new_last = step(last_id)
+            if new_last is None:
+                break
+            conn.execute("INSERT OR REPLACE INTO schema_migration_progress (version, last_id) "
+                         "VALUES (?, ?)", (version, new_last))
+        last_id = new_last
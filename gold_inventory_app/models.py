@@ -1,6 +1,8 @@
 
-from dataclasses import dataclass, asdict
-from typing import Optional, List
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, List, Optional, Tuple
 
 @dataclass
 class Product:
@@ -28,11 +30,75 @@ class Product:
     extra_images: List[str] = None
     notes: str = ""
     is_favorite: bool = False
+    # DB 가 관리 (UTC, "YYYY-MM-DD HH:MM:SS")
+    created_at: str = ""
+    updated_at: str = ""
 
-    def dict_for_db(self):
-        data = asdict(self)
-        data["discontinued"] = int(self.discontinued)
-        data["is_favorite"] = int(self.is_favorite)
-        import json
-        data["extra_images"] = json.dumps(self.extra_images or [])
-        return data
+
+
+# ─── products 쓰기 컬럼 ─────────────────────
+# (컬럼, Product 값 → DB 값, DB 값 → Product 값). db 의 INSERT / UPDATE / UPSERT,
+# 조회 결과 변환, sync 의 변경 추적 컬럼과 적용 SQL 이 모두 이 표를 따른다.
+# id, created_at, updated_at 은 DB 가 관리하고 extra_images 는 product_images 테이블에 따로 저장
+def _int0(v) -> int:
+    return int(v or 0)
+
+
+WRITE_COLUMNS: Tuple[Tuple[str, Callable | None, Callable | None], ...] = (
+    ("category", None, None), ("name", None, None), ("supplier_name", None, None),
+    ("supplier_item_no", None, None), ("product_code", None, None), ("karat", None, None),
+    ("weight_g", None, None), ("size", None, None), ("total_qb_qty", _int0, None),
+    ("labor_cost1", None, None), ("labor_cost2", None, None), ("set_no", None, None),
+    ("discontinued", int, bool), ("stock_qty", None, None), ("image_path", None, None),
+    ("notes", None, None), ("is_favorite", int, bool),
+)
+WRITE_NAMES = tuple(c[0] for c in WRITE_COLUMNS)
+_WRITE_INDEX = {c: i for i, c in enumerate(WRITE_NAMES)}
+_TO_DB = tuple((i, c[1]) for i, c in enumerate(WRITE_COLUMNS) if c[1])
+_FROM_DB = tuple((c[0], c[2]) for c in WRITE_COLUMNS)
+_get_write_values = attrgetter(*WRITE_NAMES)        # 속성 17개를 C 에서 한 번에 읽음 (asdict 복사 없음)
+
+
+def product_params(product: Product) -> list:
+    """WRITE_COLUMNS 순서의 파라미터 목록 (UPDATE 는 뒤에 id 를 붙여 씀)"""
+    values = list(_get_write_values(product))
+    for i, conv in _TO_DB:
+        values[i] = conv(values[i])
+    return values
+
+
+def to_db(col: str, value):
+    """쓰기 컬럼 하나의 값을 DB 값으로. 모르는 컬럼은 ValueError"""
+    if col not in _WRITE_INDEX:
+        raise ValueError(f"수정할 수 없는 컬럼: {col}")
+    conv = WRITE_COLUMNS[_WRITE_INDEX[col]][1]
+    return conv(value) if conv else value
+
+
+def product_fields(row) -> dict:
+    """조회 행(sqlite3.Row / dict) → Product 생성 인자 (쓰기 컬럼만)"""
+    return {c: conv(row[c]) if conv else row[c] for c, conv in _FROM_DB}
+
+
+@lru_cache(maxsize=64)
+def insert_sql(cols: Tuple[str, ...] = WRITE_NAMES) -> str:
+    return f"INSERT INTO products ({','.join(cols)}) VALUES ({','.join('?' * len(cols))})"
+
+
+@lru_cache(maxsize=64)
+def update_sql(cols: Tuple[str, ...] = WRITE_NAMES, add: Tuple[str, ...] = ()) -> str:
+    """
+    cols 는 값으로, add 는 증감으로 (c = c + ?) 갱신하는 UPDATE 문. 파라미터는 cols, add, id 순.
+    컬럼 조합마다 한 번만 만들어 sqlite3 문장 캐시도 재사용한다
+    """
+    sets = [f"{c}=?," for c in cols] + [f"{c}=COALESCE({c},0)+?," for c in add]
+    return f"UPDATE products SET {''.join(sets)}updated_at=CURRENT_TIMESTAMP WHERE id=?"
+
+@dataclass
+class SetSummary:
+    """같은 세트번호를 가진 상품들의 집계"""
+    set_no: str
+    members: int = 0
+    total_weight_g: float = 0.0
+    total_labor: float = 0.0        # 구성 상품 기본공임 + 추가공임 합
+    complete_sets: int = 0          # 구성 상품 재고의 최솟값 = 완성 세트로 팔 수 있는 수
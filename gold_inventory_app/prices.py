@@ -0,0 +1,136 @@
+"""
+금 시세 기록과 일별 재고 평가
+
+    gold_prices(day, price_per_g)                            날짜별 순금 1g 시세 (원)
+    stock_moves(day, product_id, qty_delta, fine_g_delta)    재고 순금 중량 변동 (트리거가 기록)
+
+    prices.load_csv(conn, "gold_2024.csv")                   # "날짜,시세" CSV 일괄 입력
+    v = prices.daily_valuation(conn, "2024-01-01", "2024-12-31")
+    v["day"], v["price_per_g"], v["fine_g"], v["value"]      # 날짜별 numpy 배열
+
+평가액 = 그 날 재고의 순금 중량(수량 × 중량 × 순도) × 그 날 시세.
+시세가 없는 날(주말/휴일)은 직전 시세를 쓰고, 그보다 앞선 날은 NaN.
+과거 재고는 지금 재고에서 그 날 이후의 stock_moves 를 빼서 구하므로
+상품 × 날짜 표를 만들지 않고 날짜별 변동 합만 numpy 로 누적한다.
+"""
+import csv
+import re
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .migrations import PURITY_SQL
+
+DON_G = 3.75                # 1돈 = 3.75g (시세를 돈 단위로 받을 때)
+
+_DAY_RE = re.compile(r"^(\d{4})[-./]?(\d{1,2})[-./]?(\d{1,2})$")
+
+
+def _parse_day(text: str) -> str:
+    """'2024-01-02', '2024/1/2', '2024.01.02', '20240102' → '2024-01-02'"""
+    m = _DAY_RE.match(str(text).strip())
+    if not m:
+        raise ValueError(f"날짜 형식이 아닙니다: {text!r}")
+    return date(*map(int, m.groups())).isoformat()
+
+
+def _parse_price(text) -> float:
+    try:
+        return float(str(text).replace(",", "").replace("원", "").strip())
+    except ValueError:
+        raise ValueError(f"시세가 숫자가 아닙니다: {text!r}") from None
+
+
+def set_price(conn: sqlite3.Connection, day: str, price_per_g: float):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO gold_prices (day, price_per_g) VALUES (?, ?)",
+                     (_parse_day(day), float(price_per_g)))
+
+
+def load_csv(conn: sqlite3.Connection, path: str | Path, unit: str = "g",
+             day_col: int = 0, price_col: int = 1) -> int:
+    """
+    CSV 의 (날짜, 시세) 를 한 트랜잭션으로 넣는다. 같은 날짜는 덮어씀.
+    unit="don" 이면 1돈 시세로 보고 1g 으로 환산. 첫 줄이 머리글이면 건너뜀.
+    반환: 입력한 행 수
+    """
+    if unit not in ("g", "don"):
+        raise ValueError(f"시세 단위는 g / don: {unit}")
+    per = DON_G if unit == "don" else 1.0
+
+    def rows(reader):
+        for lineno, rec in enumerate(reader, 1):
+            if not rec or not "".join(rec).strip():
+                continue
+            try:
+                day = _parse_day(rec[day_col])
+            except (ValueError, IndexError):
+                if lineno == 1:
+                    continue                # 머리글
+                raise ValueError(f"{path}:{lineno}: 날짜를 읽을 수 없습니다: {rec}") from None
+            try:
+                yield day, _parse_price(rec[price_col]) / per
+            except IndexError:
+                raise ValueError(f"{path}:{lineno}: 시세 열이 없습니다: {rec}") from None
+
+    with open(path, newline="", encoding="utf-8-sig") as f, conn:
+        cur = conn.executemany("INSERT OR REPLACE INTO gold_prices (day, price_per_g) VALUES (?, ?)",
+                               rows(csv.reader(f)))
+        return cur.rowcount
+
+
+def get_prices(conn: sqlite3.Connection, start: str | None = None,
+               end: str | None = None) -> List[Tuple[str, float]]:
+    """[start, end] 기간의 (날짜, 1g 시세). 기본키(day) 범위 조회"""
+    start = _parse_day(start) if start else "0000-00-00"
+    end = _parse_day(end) if end else "9999-99-99"
+    return [tuple(r) for r in conn.execute(
+        "SELECT day, price_per_g FROM gold_prices WHERE day BETWEEN ? AND ? ORDER BY day",
+        (start, end))]
+
+
+def daily_valuation(conn: sqlite3.Connection, start: str, end: str) -> Dict[str, np.ndarray]:
+    """
+    [start, end] 날짜별 재고 평가.
+    반환: {"day": datetime64[D], "price_per_g", "fine_g", "value": float64} 같은 길이의 배열
+    """
+    start, end = _parse_day(start), _parse_day(end)
+    if end < start:
+        raise ValueError(f"기간이 잘못되었습니다: {start} ~ {end}")
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    n = len(days)
+
+    # 시세: 시작일 직전의 마지막 시세부터 읽어 빈 날은 직전 값으로 채움
+    rows = conn.execute(
+        "SELECT day, price_per_g FROM gold_prices "
+        "WHERE day >= COALESCE((SELECT MAX(day) FROM gold_prices WHERE day <= ?), ?) AND day <= ? "
+        "ORDER BY day", (start, start, end)).fetchall()
+    price = np.full(n, np.nan)
+    if rows:
+        p_days = np.array([r[0] for r in rows], dtype="datetime64[D]")
+        p_vals = np.array([r[1] for r in rows], dtype=float)
+        idx = np.searchsorted(p_days, days, side="right") - 1
+        price = np.where(idx >= 0, p_vals[np.maximum(idx, 0)], np.nan)
+
+    # 지금 재고의 순금 중량: 상품별 수량 × 중량 × 순도 (상품 수만큼의 배열 연산)
+    prod = np.array(conn.execute(
+        f"SELECT COALESCE(stock_qty, 0), COALESCE(weight_g, 0), {PURITY_SQL.format(k='karat')} "
+        f"FROM products").fetchall(), dtype=float).reshape(-1, 3)
+    fine_now = float((prod[:, 0] * prod[:, 1] * prod[:, 2]).sum())
+
+    # 그 날 이후의 변동 합을 빼서 과거 보유량 복원 (시작일 다음 날부터의 변동만 필요)
+    moves = conn.execute("SELECT day, SUM(fine_g_delta) FROM stock_moves WHERE day > ? "
+                         "GROUP BY day ORDER BY day", (start,)).fetchall()
+    later = np.zeros(n)
+    if moves:
+        m_days = np.array([r[0] for r in moves], dtype="datetime64[D]")
+        m_vals = np.array([r[1] for r in moves], dtype=float)
+        pos = np.searchsorted(days, m_days)                 # 기간 뒤의 변동은 n 번 칸
+        per_day = np.bincount(pos, weights=m_vals, minlength=n + 1)
+        later = np.cumsum(per_day[::-1])[::-1][1:]          # later[i] = i 번째 날 이후 변동 합
+    fine = fine_now - later
+
+    return {"day": days, "price_per_g": price, "fine_g": fine, "value": fine * price}
@@ -0,0 +1,358 @@
+"""
+로컬 HTTP/JSON API 서버 (웹샵 / 매장 태블릿용). Qt 없이 표준 라이브러리만 사용.
+
+    python -m gold_inventory_app.server --db gold_data.db --port 8765
+
+GET  /products?name=&karat=&any=&sort=&dir=&limit=&after=   keyset 페이지 (JSON)
+GET  /products/stream?...                         전체 결과를 NDJSON 으로 스트리밍
+GET  /products/<id>                               단건 조회
+GET  /products/code/<상품번호>                     바코드(상품번호) 정확 일치 조회
+POST /products/<id>/favorite                      즐겨찾기 전환
+POST /products/<id>/stock      {"delta": -1}      재고 증감
+
+조회 응답에는 ETag 가 붙고 If-None-Match 가 일치하면 304 를 돌려준다.
+Accept-Encoding: gzip 이면 gzip 으로 압축한다.
+
+다른 프로그램에 내장할 때:
+
+    srv = InventoryServer("gold_data.db", port=0)
+    srv.start()            # 백그라운드 스레드
+    print(srv.url)
+    ...
+    srv.shutdown()
+"""
+import argparse
+import base64
+import gzip
+import json
+import re
+import secrets
+import threading
+import zlib
+from dataclasses import asdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .db import DataManager, DataManagerPool
+
+GZIP_MIN_BYTES = 1024       # 이보다 작은 응답은 압축하지 않음
+DEFAULT_PAGE = 100
+MAX_PAGE = 1000
+STREAM_BATCH = 500          # 스트리밍 시 한 청크에 담는 행 수
+
+_ITEM_RE = re.compile(r"^/products/(\d+)(?:/(favorite|stock))?$")
+_CODE_RE = re.compile(r"^/products/code/([^/]+)$")
+
+
+class InventoryServer:
+    def __init__(self, db_path: str | Path = "gold_data.db", host: str = "127.0.0.1",
+                 port: int = 8765, pool_size: int = 4):
+        self.db_path = Path(db_path)
+        # 쓰기는 연결 하나 + 잠금으로 직렬화
+        self.writer = DataManager(self.db_path, check_same_thread=False)
+        # 읽기와 쓰기가 서로 막지 않도록 WAL 모드 (DB 파일에 영구 저장됨)
+        self.writer.conn.execute("PRAGMA journal_mode=WAL")
+        self.write_lock = threading.Lock()
+        self.pool = DataManagerPool(self.db_path, size=pool_size)
+        # ETag 용: 이 연결은 아무것도 쓰지 않으므로 data_version 은 다른 연결의 커밋마다 증가
+        self._version_dm = DataManager(self.db_path, readonly=True, check_same_thread=False)
+        self._version_lock = threading.Lock()
+        self._instance = secrets.token_hex(4)   # 재시작 후 버전 번호가 겹쳐도 ETag 가 달라지도록
+
+        handler = type("BoundHandler", (_Handler,), {"app": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def etag(self) -> str:
+        with self._version_lock:
+            version = self._version_dm.data_version()
+        return f'"{self._instance}-{version}"'
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self) -> "InventoryServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+        self.pool.close()
+        self._version_dm.close()
+        self.writer.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    app: InventoryServer
+    protocol_version = "HTTP/1.1"
+    server_version = "GoldInventory/1.0"
+
+    # ─── routing ──────────────────────────────
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        try:
+            if parts.path == "/products":
+                self._get_page(query)
+            elif parts.path == "/products/stream":
+                self._get_stream(query)
+            else:
+                m = _ITEM_RE.match(parts.path)
+                code = _CODE_RE.match(parts.path)
+                if m and m.group(2) is None:
+                    self._get_one(int(m.group(1)))
+                elif code:
+                    self._get_by_code(unquote(code.group(1)))
+                else:
+                    self._error(HTTPStatus.NOT_FOUND, "not found")
+        except ValueError as e:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+
+    def do_POST(self):
+        # keep-alive 연결에서 다음 요청이 어긋나지 않도록 본문은 경로와 상관없이 먼저 다 읽음
+        try:
+            body = self._read_body()
+        except ValueError as e:
+            self.close_connection = True
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        m = _ITEM_RE.match(urlsplit(self.path).path)
+        if not m or m.group(2) is None:
+            self._error(HTTPStatus.NOT_FOUND, "not found")
+            return
+        pid, action = int(m.group(1)), m.group(2)
+        try:
+            delta = int(_parse_json(body).get("delta", 0)) if action == "stock" else 0
+        except (TypeError, ValueError) as e:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        with self.app.write_lock:
+            dm = self.app.writer
+            if dm.get_product(pid) is None:
+                self._error(HTTPStatus.NOT_FOUND, "product not found")
+                return
+            if action == "favorite":
+                dm.toggle_favorite(pid)
+            else:
+                try:
+                    dm.adjust_stock(pid, delta)
+                except ValueError as e:      # 재고 부족
+                    self._error(HTTPStatus.CONFLICT, str(e))
+                    return
+            product = dm.get_product(pid)
+        self._send_json(asdict(product))
+
+    # ─── handlers ─────────────────────────────
+    def _get_one(self, pid: int):
+        etag = self.app.etag()
+        if self._not_modified(etag):
+            return
+        with self.app.pool.acquire() as dm:
+            product = dm.get_product(pid)
+        if product is None:
+            self._error(HTTPStatus.NOT_FOUND, "product not found")
+            return
+        self._send_json(asdict(product), etag=etag)
+
+    def _get_by_code(self, code: str):
+        etag = self.app.etag()
+        if self._not_modified(etag):
+            return
+        with self.app.pool.acquire() as dm:
+            product = dm.get_by_code(code)
+        if product is None:
+            self._error(HTTPStatus.NOT_FOUND, "product not found")
+            return
+        self._send_json(asdict(product), etag=etag)
+
+    def _get_page(self, query: dict):
+        filters, any_text, after, limit, order_by = _parse_search(query)
+        etag = self.app.etag()
+        if self._not_modified(etag):
+            return
+        with self.app.pool.acquire() as dm:
+            products, next_cursor = dm.search_page(filters, any_text, after, limit, order_by)
+        self._send_json({
+            "items": [asdict(p) for p in products],
+            "next": _format_cursor(next_cursor),
+        }, etag=etag)
+
+    def _get_stream(self, query: dict):
+        """결과 전체를 NDJSON 청크로 전송 (메모리에 모으지 않음)"""
+        filters, any_text, after, _, order_by = _parse_search(query)
+        etag = self.app.etag()
+        if self._not_modified(etag):
+            return
+        with self.app.pool.acquire() as dm:
+            # 잘못된 필터/정렬은 헤더를 보내기 전에 ValueError → 400
+            products = dm.iter_products(filters, any_text, after, order_by)
+            use_gzip = self._accepts_gzip()
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("ETag", _gzip_etag(etag) if use_gzip else etag)
+            self.send_header("Vary", "Accept-Encoding")
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+
+            comp = zlib.compressobj(6, zlib.DEFLATED, 31) if use_gzip else None
+            batch = []
+            for p in products:
+                batch.append(json.dumps(asdict(p), ensure_ascii=False))
+                if len(batch) >= STREAM_BATCH:
+                    self._write_chunk(_encode_lines(batch), comp)
+                    batch.clear()
+        if batch:
+            self._write_chunk(_encode_lines(batch), comp)
+        if comp is not None:
+            self._write_raw_chunk(comp.flush())
+        self._write_raw_chunk(b"")   # 종료 청크
+
+    # ─── helpers ──────────────────────────────
+    def _write_chunk(self, data: bytes, comp):
+        if comp is not None:
+            data = comp.compress(data) + comp.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            self._write_raw_chunk(data)
+
+    def _write_raw_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+    def _read_body(self) -> bytes:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ValueError("invalid Content-Length") from None
+        if length < 0:
+            raise ValueError("invalid Content-Length")
+        return self.rfile.read(length) if length else b""
+
+    def _accepts_gzip(self) -> bool:
+        return "gzip" in (self.headers.get("Accept-Encoding") or "")
+
+    def _not_modified(self, etag: str) -> bool:
+        """If-None-Match 가 지금 ETag (gzip 이면 -gz 표현 포함) 와 맞으면 304"""
+        inm = self.headers.get("If-None-Match")
+        if not inm:
+            return False
+        tags = {t.strip() for t in inm.split(",")}
+        current = [etag, _gzip_etag(etag)] if self._accepts_gzip() else [etag]
+        matched = next((t for t in current if t in tags), etag if "*" in tags else None)
+        if matched:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", matched)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return True
+        return False
+
+    def _send_json(self, obj, status=HTTPStatus.OK, etag: str | None = None):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        use_gzip = len(body) >= GZIP_MIN_BYTES and self._accepts_gzip()
+        if etag:
+            self.send_header("ETag", _gzip_etag(etag) if use_gzip else etag)
+        if use_gzip:
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: HTTPStatus, message: str):
+        self._send_json({"error": message}, status=status)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 stderr 에 찍지 않음
+
+
+def _gzip_etag(etag: str) -> str:
+    """gzip 표현의 ETag — 바이트가 다르므로 강한 ETag 도 달라야 함 ('"a-1"' → '"a-1-gz"')"""
+    return f'{etag[:-1]}-gz"'
+
+
+def _parse_json(body: bytes) -> dict:
+    if not body:
+        return {}
+    try:
+        obj = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from None
+    if not isinstance(obj, dict):
+        raise ValueError("JSON object expected")
+    return obj
+
+
+def _encode_lines(lines) -> bytes:
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _parse_search(query: dict):
+    query = dict(query)
+    any_text = query.pop("any", "")
+    limit = int(query.pop("limit", DEFAULT_PAGE))
+    if not 1 <= limit <= MAX_PAGE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE}")
+    after = _parse_cursor(query.pop("after", ""))
+    sort = query.pop("sort", "")
+    order_by = (sort, query.pop("dir", "asc")) if sort else None
+    return query, any_text, after, limit, order_by
+
+
+def _format_cursor(cursor) -> str | None:
+    """커서(정렬 컬럼 값 튜플) → URL 에 그대로 쓸 수 있는 문자열"""
+    if cursor is None:
+        return None
+    raw = json.dumps(list(cursor), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _parse_cursor(text: str):
+    if not text:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        cursor = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"invalid cursor: {text!r}") from None
+    if not isinstance(cursor, list):
+        raise ValueError(f"invalid cursor: {text!r}")
+    return tuple(cursor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gold_inventory_app.server",
+                                     description="GOLD MANAGER 로컬 HTTP/JSON API 서버")
+    parser.add_argument("--db", default="gold_data.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pool-size", type=int, default=4, help="읽기 연결 수")
+    args = parser.parse_args(argv)
+
+    srv = InventoryServer(args.db, args.host, args.port, args.pool_size)
+    print(f"listening on {srv.url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
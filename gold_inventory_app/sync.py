@@ -0,0 +1,432 @@
+"""
+매장 간 동기화 (변경 로그 + 델타 파일)
+
+products 에 걸린 트리거가 모든 INSERT/UPDATE/DELETE 를 product_changes 에 기록한다.
+
+    product_changes(seq, uid, product_id, op, changed_cols, hlc, origin)
+
+- uid          : 매장 간에 공유되는 상품 식별자 (product_uids 가 로컬 id ↔ uid 매핑)
+- op           : 'I' / 'U' / 'D'
+- changed_cols : 바뀐 컬럼 이름 (쉼표 구분)
+- stock_delta  : 재고 수량 증감 (등록 시에는 초기 재고). 재고는 이 값들의 합으로 맞춘다
+- hlc          : 하이브리드 논리 시계 = 밀리초 << 16 + 카운터. 같은 매장 안에서는 항상 증가
+- origin       : 변경이 처음 일어난 매장의 store_id
+
+export_delta 는 워터마크(로컬 seq) 이후 바뀐 행만 gzip JSON Lines 파일로 내보내고,
+import_delta 는 그 파일을 적용한다. 충돌은 컬럼 단위로 (hlc, origin) 이 더 큰 쪽이
+이기고, 삭제는 어느 매장에서든 한 번 일어나면 최종이다. 재고 수량만은 각 매장의
+증감분을 (hlc, origin) 별로 한 번씩 더하므로 동시에 판매/입고해도 모두 반영된다.
+같은 델타를 여러 번 적용하거나 순서를 바꿔 적용해도 결과가 같다.
+
+    python -m gold_inventory_app.cli sync-export --peer 강남점 to_gangnam.delta
+    python -m gold_inventory_app.cli sync-import from_gangnam.delta
+"""
+import gzip
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .migrations import EXTRA_IMAGES_SQL
+from .models import WRITE_NAMES, insert_sql, update_sql
+
+DELTA_FORMAT = "gold-inventory-delta"
+DELTA_VERSION = 2          # 2: 재고를 증감분("stock")으로 전달
+
+# 변경 추적 대상 컬럼 = 쓰기 컬럼 (id, created_at, updated_at 제외)
+TRACKED_COLUMNS = WRITE_NAMES
+# 재고 수량은 마지막 값이 아니라 증감분(stock_delta)으로 복제 — 두 매장의 판매가 모두 반영됨
+STOCK_COLUMN = "stock_qty"
+# 마지막 기록이 이기는(LWW) 컬럼
+LWW_COLUMNS = tuple(c for c in TRACKED_COLUMNS if c != STOCK_COLUMN)
+# product_images 자식 테이블은 델타에서 JSON 배열 문자열 하나의 컬럼으로 다룸
+IMAGES_COLUMN = "extra_images"
+
+_NOW_HLC = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER) * 65536"
+_TICK = f"UPDATE sync_state SET clock = max(clock + 1, {_NOW_HLC}) WHERE id = 1;"
+_NOT_APPLYING = "(SELECT applying FROM sync_state WHERE id = 1) = 0"
+
+Stamp = Tuple[int, str]   # (hlc, origin) — 튜플 비교로 충돌 해결
+
+
+_TABLES = ("sync_state", "product_uids", "product_changes", "sync_peers")
+_TABLES_SQL = (
+    """CREATE TABLE IF NOT EXISTS sync_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        store_id TEXT NOT NULL,
+        clock INTEGER NOT NULL DEFAULT 0,
+        applying INTEGER NOT NULL DEFAULT 0
+    )""",
+    "INSERT OR IGNORE INTO sync_state (id, store_id) VALUES (1, lower(hex(randomblob(8))))",
+    """CREATE TABLE IF NOT EXISTS product_uids (
+        product_id INTEGER PRIMARY KEY,
+        uid TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS product_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        uid TEXT NOT NULL,
+        product_id INTEGER,
+        op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D')),
+        changed_cols TEXT NOT NULL DEFAULT '',
+        hlc INTEGER NOT NULL,
+        origin TEXT NOT NULL,
+        stock_delta INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_product_changes_uid ON product_changes (uid, hlc)",
+    """CREATE TABLE IF NOT EXISTS sync_peers (
+        peer TEXT PRIMARY KEY,
+        sent_seq INTEGER NOT NULL DEFAULT 0
+    )""",
+)
+
+
+def _trigger_sql() -> Dict[str, str]:
+    """트리거 이름 → CREATE 문. install 이 sqlite_master 의 정의와 비교해 바뀐 것만 다시 만든다"""
+    cols_all = ",".join(TRACKED_COLUMNS + (IMAGES_COLUMN,))
+    changed_expr = " || ".join(
+        f"(CASE WHEN OLD.{c} IS NOT NEW.{c} THEN '{c},' ELSE '' END)" for c in TRACKED_COLUMNS)
+    any_changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in TRACKED_COLUMNS)
+    delta = (f"CASE WHEN OLD.{STOCK_COLUMN} IS NOT NEW.{STOCK_COLUMN} "
+             f"THEN COALESCE(NEW.{STOCK_COLUMN}, 0) - COALESCE(OLD.{STOCK_COLUMN}, 0) END")
+    triggers = {
+        "trg_products_cdc_insert": f"""CREATE TRIGGER trg_products_cdc_insert
+        AFTER INSERT ON products WHEN {_NOT_APPLYING}
+        BEGIN
+            {_TICK}
+            INSERT OR IGNORE INTO product_uids (product_id, uid)
+                VALUES (NEW.id, lower(hex(randomblob(16))));
+            INSERT INTO product_changes (uid, product_id, op, changed_cols, hlc, origin, stock_delta)
+                SELECT u.uid, NEW.id, 'I', '{cols_all}', s.clock, s.store_id,
+                       COALESCE(NEW.{STOCK_COLUMN}, 0)
+                FROM product_uids u, sync_state s WHERE u.product_id = NEW.id AND s.id = 1;
+        END""",
+        "trg_products_cdc_update": f"""CREATE TRIGGER trg_products_cdc_update
+        AFTER UPDATE ON products WHEN {_NOT_APPLYING} AND ({any_changed})
+        BEGIN
+            {_TICK}
+            INSERT INTO product_changes (uid, product_id, op, changed_cols, hlc, origin, stock_delta)
+                SELECT u.uid, NEW.id, 'U', rtrim({changed_expr}, ','), s.clock, s.store_id, {delta}
+                FROM product_uids u, sync_state s WHERE u.product_id = NEW.id AND s.id = 1;
+        END""",
+        "trg_products_cdc_delete": f"""CREATE TRIGGER trg_products_cdc_delete
+        AFTER DELETE ON products WHEN {_NOT_APPLYING}
+        BEGIN
+            {_TICK}
+            INSERT INTO product_changes (uid, product_id, op, changed_cols, hlc, origin)
+                SELECT u.uid, OLD.id, 'D', '', s.clock, s.store_id
+                FROM product_uids u, sync_state s WHERE u.product_id = OLD.id AND s.id = 1;
+        END""",
+    }
+    # 추가 이미지가 바뀌면 부모 상품의 extra_images 변경으로 기록 (상품 삭제에 따른 정리는 제외)
+    for event, ref in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        name = f"trg_product_images_cdc_{event.lower()}"
+        triggers[name] = f"""CREATE TRIGGER {name}
+        AFTER {event} ON product_images
+        WHEN {_NOT_APPLYING} AND EXISTS (SELECT 1 FROM products WHERE id = {ref}.product_id)
+        BEGIN
+            {_TICK}
+            INSERT INTO product_changes (uid, product_id, op, changed_cols, hlc, origin)
+                SELECT u.uid, {ref}.product_id, 'U', '{IMAGES_COLUMN}', s.clock, s.store_id
+                FROM product_uids u, sync_state s WHERE u.product_id = {ref}.product_id AND s.id = 1;
+        END"""
+    return triggers
+
+
+_MISSING_UIDS_SQL = ("SELECT EXISTS (SELECT 1 FROM products p WHERE NOT EXISTS "
+                     "(SELECT 1 FROM product_uids u WHERE u.product_id = p.id))")
+
+
+def install(conn: sqlite3.Connection):
+    """
+    변경 로그 테이블과 트리거 생성. 이미 최신이면 읽기만 하고 돌아가므로
+    다른 연결이 쓰는 중에도 DB 를 열 수 있다. 고칠 것이 있을 때만 BEGIN IMMEDIATE 로 적용
+    """
+    triggers = _trigger_sql()
+    if not _install_needed(conn, triggers):
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for stmt in _TABLES_SQL:
+            conn.execute(stmt)
+        if "stock_delta" not in {r[1] for r in conn.execute("PRAGMA table_info(product_changes)")}:
+            conn.execute("ALTER TABLE product_changes ADD COLUMN stock_delta INTEGER")
+            # 이전 로그의 등록 행은 지금 재고를 초기 재고로 삼음 (그 전 증감은 전달되지 않음)
+            conn.execute(f"""UPDATE product_changes SET stock_delta = COALESCE(
+                                 (SELECT {STOCK_COLUMN} FROM products WHERE id = product_id), 0)
+                             WHERE op = 'I'""")
+        current = _current_triggers(conn)
+        for name in current.keys() - triggers.keys():
+            conn.execute(f"DROP TRIGGER {name}")
+        for name, sql in triggers.items():
+            if current.get(name) != sql:
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                conn.execute(sql)
+        if conn.execute(_MISSING_UIDS_SQL).fetchone()[0]:
+            _backfill_uids(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _current_triggers(conn) -> Dict[str, str]:
+    return dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_product%cdc%'"))
+
+
+def _install_needed(conn, triggers: Dict[str, str]) -> bool:
+    tables = {r[0] for r in conn.execute(
+        f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN "
+        f"({','.join('?' * len(_TABLES))})", _TABLES)}
+    if len(tables) < len(_TABLES) or _current_triggers(conn) != triggers:
+        return True
+    if conn.execute("SELECT 1 FROM sync_state WHERE id = 1").fetchone() is None:
+        return True
+    if "stock_delta" not in {r[1] for r in conn.execute("PRAGMA table_info(product_changes)")}:
+        return True
+    return bool(conn.execute(_MISSING_UIDS_SQL).fetchone()[0])
+
+
+def _backfill_uids(conn):
+    """트리거 도입 이전에 있던 상품: uid 를 붙이고 기준선 'I' 변경으로 기록 (재고는 전량 증가분)"""
+    cols_all = ",".join(TRACKED_COLUMNS + (IMAGES_COLUMN,))
+    conn.execute(_TICK)
+    conn.execute("""
+        INSERT INTO product_uids (product_id, uid)
+        SELECT id, lower(hex(randomblob(16))) FROM products
+        WHERE id NOT IN (SELECT product_id FROM product_uids)
+    """)
+    conn.execute(f"""
+        INSERT INTO product_changes (uid, product_id, op, changed_cols, hlc, origin, stock_delta)
+        SELECT u.uid, p.id, 'I', '{cols_all}', s.clock, s.store_id, COALESCE(p.{STOCK_COLUMN}, 0)
+        FROM products p
+        JOIN product_uids u ON u.product_id = p.id
+        JOIN sync_state s ON s.id = 1
+        WHERE NOT EXISTS (SELECT 1 FROM product_changes c WHERE c.uid = u.uid)
+    """)
+
+
+def store_id(conn: sqlite3.Connection) -> str:
+    return conn.execute("SELECT store_id FROM sync_state WHERE id = 1").fetchone()[0]
+
+
+def export_delta(conn: sqlite3.Connection, path: str | Path, peer: str | None = None,
+                 since: int | None = None) -> Dict[str, int]:
+    """
+    seq > since 인 변경을 델타 파일로 저장.
+    peer 를 주면 그 매장에 마지막으로 보낸 seq 를 워터마크로 쓰고, 저장 후 갱신한다.
+    반환: {"rows": 행 수, "from_seq": ..., "to_seq": ...}
+    """
+    if since is None:
+        since = 0
+        if peer is not None:
+            row = conn.execute("SELECT sent_seq FROM sync_peers WHERE peer = ?", (peer,)).fetchone()
+            since = row[0] if row else 0
+
+    to_seq = since
+    ops: Dict[str, str] = {}
+    stamps: Dict[str, Dict[str, Stamp]] = {}   # uid → {col: (hlc, origin)}
+    deleted: Dict[str, Stamp] = {}
+    stock: Dict[str, List[list]] = {}          # uid → [[증감, hlc, origin], ...]
+    for seq, uid, op, cols, hlc, origin, delta in conn.execute(
+            "SELECT seq, uid, op, changed_cols, hlc, origin, stock_delta FROM product_changes "
+            "WHERE seq > ? ORDER BY seq", (since,)):
+        to_seq = seq
+        if op == "D":
+            deleted[uid] = max(deleted.get(uid, (0, "")), (hlc, origin))
+            continue
+        if op == "I" or uid not in ops:
+            ops[uid] = op
+        col_stamps = stamps.setdefault(uid, {})
+        for c in filter(None, cols.split(",")):
+            if c != STOCK_COLUMN:
+                col_stamps[c] = max(col_stamps.get(c, (0, "")), (hlc, origin))
+        if delta is not None:
+            stock.setdefault(uid, []).append([delta, hlc, origin])
+
+    records = []
+    for uid, stamp in deleted.items():
+        records.append({"uid": uid, "op": "D", "hlc": stamp[0], "origin": stamp[1]})
+    live = [uid for uid in stamps if uid not in deleted]
+    for chunk in _chunks(live, 500):
+        marks = ",".join("?" * len(chunk))
+        cur = conn.execute(
+            f"SELECT u.uid, {','.join(f'p.{c}' for c in TRACKED_COLUMNS)}, "
+            f"{EXTRA_IMAGES_SQL} AS {IMAGES_COLUMN} "
+            f"FROM products p JOIN product_uids u ON u.product_id = p.id "
+            f"WHERE u.uid IN ({marks})", chunk)
+        keys = [d[0] for d in cur.description]
+        for values in cur:
+            row = dict(zip(keys, values))
+            uid = row["uid"]
+            cols = {c: [row[c], st[0], st[1]]
+                    for c, st in sorted(stamps[uid].items()) if c in row}
+            rec = {"uid": uid, "op": ops[uid], "cols": cols}
+            if uid in stock:
+                rec["stock"] = stock[uid]
+            records.append(rec)
+    records.sort(key=lambda r: r["uid"])
+
+    header = {"format": DELTA_FORMAT, "version": DELTA_VERSION, "origin": store_id(conn),
+              "from_seq": since, "to_seq": to_seq}
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    if peer is not None:
+        with conn:
+            conn.execute("""INSERT INTO sync_peers (peer, sent_seq) VALUES (?, ?)
+                            ON CONFLICT (peer) DO UPDATE SET sent_seq = excluded.sent_seq""",
+                         (peer, to_seq))
+    return {"rows": len(records), "from_seq": since, "to_seq": to_seq}
+
+
+def import_delta(conn: sqlite3.Connection, path: str | Path) -> Dict[str, int]:
+    """
+    델타 파일 적용. 한 트랜잭션으로 처리되며 적용된 변경은 원래의 (hlc, origin) 그대로
+    로컬 변경 로그에 남으므로 다른 매장으로 다시 전달된다.
+    반환: {"inserted", "updated", "deleted", "skipped", "code_conflicts"} 건수
+    (code_conflicts: 이 매장에서 이미 다른 상품이 쓰는 상품번호라 그 컬럼만 반영하지 않은 건)
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != DELTA_FORMAT or header.get("version") != DELTA_VERSION:
+            raise ValueError(f"델타 파일 형식이 아닙니다: {path}")
+        records = [json.loads(line) for line in f if line.strip()]
+
+    result = {"inserted": 0, "updated": 0, "deleted": 0, "skipped": 0, "code_conflicts": 0}
+    max_hlc = 0
+    with conn:
+        conn.execute("UPDATE sync_state SET applying = 1 WHERE id = 1")
+        try:
+            for chunk in _chunks(records, 500):
+                uids = [r["uid"] for r in chunk]
+                local = _local_state(conn, uids)
+                for rec in chunk:
+                    max_hlc = max(max_hlc, _record_max_hlc(rec))
+                    pid, stamps, deleted = local.get(rec["uid"], (None, {}, False))
+                    result[_apply_record(conn, rec, pid, stamps, deleted, result)] += 1
+            # Lamport 수신 규칙: 로컬 시계를 받은 시계 이상으로 당김
+            conn.execute("UPDATE sync_state SET clock = max(clock, ?) WHERE id = 1", (max_hlc,))
+        finally:
+            conn.execute("UPDATE sync_state SET applying = 0 WHERE id = 1")
+    return result
+
+
+def _local_state(conn, uids: List[str]):
+    """uid → (로컬 product_id, {col: 최신 (hlc, origin)}, 삭제됨 여부)"""
+    marks = ",".join("?" * len(uids))
+    state = {}
+    for uid, pid in conn.execute(
+            f"SELECT uid, product_id FROM product_uids WHERE uid IN ({marks})", uids):
+        state[uid] = (pid, {}, False)
+    for uid, op, cols, hlc, origin in conn.execute(
+            f"SELECT uid, op, changed_cols, hlc, origin FROM product_changes "
+            f"WHERE uid IN ({marks})", uids):
+        pid, stamps, deleted = state.get(uid, (None, {}, False))
+        if op == "D":
+            deleted = True
+        for c in filter(None, cols.split(",")):
+            stamps[c] = max(stamps.get(c, (0, "")), (hlc, origin))
+        state[uid] = (pid, stamps, deleted)
+    return state
+
+
+def _record_max_hlc(rec) -> int:
+    if rec["op"] == "D":
+        return rec["hlc"]
+    return max([v[1] for v in rec["cols"].values()] + [d[1] for d in rec.get("stock", ())],
+               default=0)
+
+
+def _apply_record(conn, rec, pid, stamps: Dict[str, Stamp], deleted: bool,
+                  result: Dict[str, int]) -> str:
+    uid = rec["uid"]
+    if deleted:
+        return "skipped"                      # 삭제는 최종
+    if rec["op"] == "D":
+        if pid is not None:
+            conn.execute("DELETE FROM products WHERE id = ?", (pid,))
+        _log(conn, uid, pid, "D", [], (rec["hlc"], rec["origin"]))
+        return "deleted"
+
+    cols = {c: v for c, v in rec["cols"].items() if c in LWW_COLUMNS or c == IMAGES_COLUMN}
+    if _code_taken(conn, cols, pid):
+        del cols["product_code"]              # 상품번호는 매장 안에서 유일 (uq 인덱스)
+        result["code_conflicts"] += 1
+    if pid is None and "name" not in cols:
+        return "skipped"                      # 최초 등록분을 받지 못한 경우
+    # 아직 적용하지 않은 재고 증감만 (같은 (hlc, origin) 변경이 로그에 있으면 이미 반영됨)
+    deltas: Dict[Stamp, int] = {}
+    for delta, hlc, origin in rec.get("stock", ()):
+        if (hlc, origin) not in deltas and not _delta_applied(conn, uid, hlc, origin):
+            deltas[(hlc, origin)] = int(delta)
+
+    if pid is None:
+        names = tuple(c for c in LWW_COLUMNS if c in cols)
+        cur = conn.execute(insert_sql(names + (STOCK_COLUMN,)),
+                           [cols[c][0] for c in names] + [sum(deltas.values())])
+        pid = cur.lastrowid
+        conn.execute("INSERT INTO product_uids (product_id, uid) VALUES (?, ?)", (pid, uid))
+        if IMAGES_COLUMN in cols:
+            _replace_images(conn, pid, cols[IMAGES_COLUMN][0])
+        _log_groups(conn, uid, pid, "I", {c: (v[1], v[2]) for c, v in cols.items()}, deltas)
+        return "inserted"
+
+    winners = {c: v for c, v in cols.items() if (v[1], v[2]) > stamps.get(c, (0, ""))}
+    if not winners and not deltas:
+        return "skipped"
+    names = tuple(c for c in LWW_COLUMNS if c in winners)
+    add = (STOCK_COLUMN,) if deltas else ()
+    conn.execute(update_sql(names, add),
+                 [winners[c][0] for c in names] + [sum(deltas.values())] * len(add) + [pid])
+    if IMAGES_COLUMN in winners:
+        _replace_images(conn, pid, winners[IMAGES_COLUMN][0])
+    _log_groups(conn, uid, pid, "U", {c: (v[1], v[2]) for c, v in winners.items()}, deltas)
+    return "updated"
+
+
+def _delta_applied(conn, uid: str, hlc: int, origin: str) -> bool:
+    """재고 증감은 같은 변경의 다른 컬럼과 한 행으로 기록되므로 그 행이 있으면 이미 반영된 것"""
+    return conn.execute("SELECT 1 FROM product_changes WHERE uid = ? AND hlc = ? AND origin = ?",
+                        (uid, hlc, origin)).fetchone() is not None
+
+
+def _code_taken(conn, cols, pid) -> bool:
+    code = cols.get("product_code", (None,))[0]
+    if not code:
+        return False
+    row = conn.execute("SELECT id FROM products WHERE product_code = ? AND product_code <> ''",
+                       (code,)).fetchone()
+    return row is not None and row[0] != pid
+
+
+def _replace_images(conn, pid: int, value):
+    paths = json.loads(value or "[]") if isinstance(value, str) else (value or [])
+    conn.execute("DELETE FROM product_images WHERE product_id = ?", (pid,))
+    conn.executemany("INSERT INTO product_images (product_id, position, path) VALUES (?, ?, ?)",
+                     ((pid, i, p) for i, p in enumerate(paths) if p))
+
+
+def _log_groups(conn, uid, pid, op, col_stamps: Dict[str, Stamp],
+                deltas: Dict[Stamp, int] | None = None):
+    """같은 (hlc, origin) 의 컬럼과 재고 증감을 한 행으로 기록 (원래 변경과 같은 모양)"""
+    deltas = deltas or {}
+    groups: Dict[Stamp, List[str]] = {st: [STOCK_COLUMN] for st in deltas}
+    for c, st in col_stamps.items():
+        groups.setdefault(st, []).append(c)
+    for st in sorted(groups):
+        _log(conn, uid, pid, op, groups[st], st, deltas.get(st))
+
+
+def _log(conn, uid, pid, op, cols: List[str], stamp: Stamp, stock_delta: int | None = None):
+    conn.execute(
+        "INSERT INTO product_changes (uid, product_id, op, changed_cols, hlc, origin, stock_delta) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (uid, pid, op, ",".join(sorted(cols)), stamp[0], stamp[1], stock_delta))
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
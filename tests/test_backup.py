@@ -0,0 +1,33 @@
+import pytest
+
+from gold_inventory_app import cli
+from gold_inventory_app.backup import BackupError, BackupManager
+from gold_inventory_app.db import DataManager
+from gold_inventory_app.models import Product
+
+
+def _snapshot(tmp_path, compress=True):
+    db = tmp_path / "gold.db"
+    dm = DataManager(db)
+    dm.add_product(Product(name="반지", stock_qty=2))
+    dm.close()
+    return db, BackupManager(db, tmp_path / "bk", compress=compress).backup_now()
+
+
+def test_cli_restores_over_corrupted_db(tmp_path):
+    db, snap = _snapshot(tmp_path)
+    db.write_bytes(b"not a database" * 500)
+    assert cli.main(["--db", str(db), "stats"]) == 1
+    assert cli.main(["--db", str(db), "restore", "--dir", str(tmp_path / "bk"), str(snap)]) == 0
+    dm = DataManager(db)
+    assert [p.name for p in dm.iter_products()] == ["반지"]
+    dm.close()
+
+
+def test_damaged_snapshot_raises_backup_error(tmp_path):
+    db, snap = _snapshot(tmp_path, compress=False)
+    snap.write_bytes(b"garbage" * 2000)
+    with pytest.raises(BackupError):
+        BackupManager(db, tmp_path / "bk").restore(snap)
+    assert cli.main(["--db", str(db), "restore", "--dir", str(tmp_path / "bk"), str(snap)]) == 1
+    assert not (tmp_path / "gold.db.restoring").exists()
@@ -0,0 +1,51 @@
+from gold_inventory_app import dedup
+from gold_inventory_app.db import DataManager
+from gold_inventory_app.models import Product
+
+
+def test_block_buckets_are_consecutive():
+    """허용 오차만큼 떨어진 중량은 항상 바로 다음 구간 (실수 나눗셈 경계 오류 방지)"""
+    for i in range(1, 2000):
+        lo, hi = round(i * dedup.WEIGHT_TOL_G, 1), round((i + 1) * dedup.WEIGHT_TOL_G, 1)
+        assert dedup._block_key("R", "18K", hi)[2] - dedup._block_key("R", "18K", lo)[2] == 1, (lo, hi)
+
+
+def _pairs_one_tolerance_apart(tmp_path, n=200):
+    dm = DataManager(tmp_path / "dupes.db")
+    expected = []
+    for i in range(1, n):
+        w = round(i * dedup.WEIGHT_TOL_G, 1)
+        # 품목을 쌍마다 다르게 해서 쌍끼리 섞이지 않게 함
+        a = dm.add_product(Product(category=f"C{i}", name="루비 반지 하트", karat="18K", weight_g=w))
+        b = dm.add_product(Product(category=f"C{i}", name="루비 반지 하트", karat="18K",
+                                   weight_g=round(w + dedup.WEIGHT_TOL_G, 1)))
+        expected.append([a, b])
+    return dm, expected
+
+
+def test_pairs_one_tolerance_apart_are_found(tmp_path):
+    dm, expected = _pairs_one_tolerance_apart(tmp_path)
+    for workers in (1, 2):
+        groups = dedup.find_duplicates(dm.conn, workers=workers)
+        assert sorted(g.ids for g in groups) == expected
+    dm.close()
+
+
+def test_reported_example(tmp_path):
+    dm = DataManager(tmp_path / "dupes.db")
+    a = dm.add_product(Product(category="R", name="루비 반지 하트", karat="18K", weight_g=3.1))
+    b = dm.add_product(Product(category="R", name="루비 반지 하트", karat="18K", weight_g=3.2))
+    dm.add_product(Product(category="R", name="루비 반지 하트", karat="18K", weight_g=3.35))
+    assert [g.ids for g in dedup.find_duplicates(dm.conn, workers=1)] == [[a, b]]
+    dm.close()
+
+
+def test_merge_ignores_repeated_ids(tmp_path):
+    dm = DataManager(tmp_path / "merge.db")
+    a = dm.add_product(Product(name="루비 반지", stock_qty=1))
+    b = dm.add_product(Product(name="루비반지", stock_qty=5))
+    kept = dm.merge_products(a, [b, b, a])
+    assert kept.stock_qty == 6
+    assert kept.notes.count(f"병합: #{b}") == 1
+    assert dm.get_product(b) is None
+    dm.close()
@@ -0,0 +1,105 @@
+import json
+import sqlite3
+
+import pytest
+
+from gold_inventory_app import migrations
+
+# 기준 코드가 만들던 products 테이블 (user_version 0)
+BASELINE_TABLE = """
+    CREATE TABLE products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT, name TEXT NOT NULL, supplier_name TEXT, supplier_item_no TEXT,
+        product_code TEXT, karat TEXT, weight_g REAL, size TEXT, total_qb_qty TEXT,
+        labor_cost1 REAL, labor_cost2 REAL, set_no TEXT, discontinued INTEGER DEFAULT 0,
+        stock_qty INTEGER, image_path TEXT, extra_images TEXT, notes TEXT,
+        is_favorite INTEGER DEFAULT 0
+    )"""
+
+QB_VALUES = ["3", " 12 ", "", None, "약 5개", "2+1"]
+IMAGES = ['["a.jpg", "b.jpg"]', "[]", "not json", None, '["c.jpg"]']
+
+
+def _baseline_db(path, n=25):
+    conn = sqlite3.connect(path)
+    conn.execute(BASELINE_TABLE)
+    with conn:
+        for i in range(1, n + 1):
+            conn.execute(
+                "INSERT INTO products (name, product_code, total_qb_qty, extra_images, notes, stock_qty) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (f"상품{i}", f"C{i}", QB_VALUES[i % len(QB_VALUES)], IMAGES[i % len(IMAGES)],
+                 "메모" if i % 2 else None, i))
+        # 끝 번호를 지워 두면 AUTOINCREMENT 시퀀스가 MAX(id) 보다 커짐
+        conn.execute("DELETE FROM products WHERE id > ?", (n - 2,))
+    return conn
+
+
+def _expected_images(conn):
+    expected = {}
+    for pid, raw in conn.execute("SELECT id, extra_images FROM products"):
+        try:
+            paths = json.loads(raw) if raw else []
+        except ValueError:
+            paths = []
+        if paths:
+            expected[pid] = paths
+    return expected
+
+
+def test_interrupted_rebuild_resumes(tmp_path, monkeypatch):
+    conn = _baseline_db(tmp_path / "old.db")
+    rows = {r[0]: (r[1], r[2]) for r in conn.execute("SELECT id, total_qb_qty, notes FROM products")}
+    images = _expected_images(conn)
+
+    run_batches = migrations._run_batches
+
+    def interrupted(conn, version, step):
+        if version != 3:
+            return run_batches(conn, version, step)
+        calls = []
+
+        def failing(last_id):
+            calls.append(last_id)
+            new_last = step(last_id)
+            if len(calls) == 3:
+                raise KeyboardInterrupt    # 세 번째 배치를 복사한 뒤 커밋 전에 끊긴 것처럼
+            return new_last
+        return run_batches(conn, version, failing)
+
+    monkeypatch.setattr(migrations, "_run_batches", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        migrations.migrate(conn, batch_size=4)
+    assert migrations.current_version(conn) == 2
+    assert conn.execute("SELECT last_id FROM schema_migration_progress WHERE version = 3").fetchone()[0] == 8
+    assert conn.execute("SELECT COUNT(*) FROM products_v3").fetchone()[0] == 8
+    conn.close()
+
+    monkeypatch.undo()
+    conn = sqlite3.connect(tmp_path / "old.db")
+    assert migrations.migrate(conn, batch_size=4) == migrations.LATEST_VERSION
+
+    assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == len(rows) == 23
+    assert conn.execute("SELECT COUNT(*) FROM schema_migration_progress").fetchone()[0] == 0
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'products_v3'").fetchone() is None
+
+    got_images = {}
+    for pid, path in conn.execute("SELECT product_id, path FROM product_images ORDER BY product_id, position"):
+        got_images.setdefault(pid, []).append(path)
+    assert got_images == images
+
+    for pid, qb, notes in conn.execute("SELECT id, total_qb_qty, notes FROM products"):
+        old_qb, old_notes = rows[pid]
+        text = (old_qb or "").strip()
+        if text.isdigit():
+            assert (qb, notes) == (int(text), old_notes)
+        elif not text:
+            assert (qb, notes) == (0, old_notes)
+        else:
+            assert qb == 0
+            assert notes == f"{old_notes or ''}\n총QB수량: {old_qb}"
+
+    assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'products'").fetchone()[0] == 25
+    new_id = conn.execute("INSERT INTO products (name) VALUES ('새 상품')").lastrowid
+    assert new_id == 26
+    conn.close()
@@ -0,0 +1,67 @@
+import gzip
+import http.client
+import json
+
+from gold_inventory_app.db import DataManager
+from gold_inventory_app.models import Product
+from gold_inventory_app.server import InventoryServer
+
+
+def _start(tmp_path, n=1):
+    dm = DataManager(tmp_path / "server.db")
+    for i in range(n):
+        dm.add_product(Product(name=f"상품{i}", product_code=f"C{i}", stock_qty=3))
+    dm.close()
+    app = InventoryServer(tmp_path / "server.db", port=0).start()
+    host, port = app.httpd.server_address[:2]
+    return app, http.client.HTTPConnection(host, port, timeout=5)
+
+
+def _call(conn, method, path, body=None, headers=None):
+    data = json.dumps(body).encode() if body is not None else None
+    conn.request(method, path, body=data, headers=headers or {})
+    resp = conn.getresponse()
+    return resp, resp.read()
+
+
+def test_post_bodies_are_consumed_on_keep_alive(tmp_path):
+    app, conn = _start(tmp_path)
+    try:
+        # favorite 와 404 는 본문을 쓰지 않지만 같은 연결의 다음 요청이 깨지면 안 됨
+        resp, _ = _call(conn, "POST", "/products/1/favorite", {"ignored": True})
+        assert resp.status == 200
+        resp, _ = _call(conn, "POST", "/nowhere", {"ignored": True})
+        assert resp.status == 404
+        resp, _ = _call(conn, "POST", "/products/1/stock", {"delta": -1})
+        assert resp.status == 200
+        resp, body = _call(conn, "GET", "/products/1")
+        assert resp.status == 200
+        product = json.loads(body)
+        assert product["stock_qty"] == 2 and product["is_favorite"]
+    finally:
+        conn.close()
+        app.shutdown()
+
+
+def test_gzip_response_has_its_own_etag(tmp_path):
+    app, conn = _start(tmp_path, n=40)
+    try:
+        resp, plain = _call(conn, "GET", "/products?limit=40")
+        identity_tag = resp.getheader("ETag")
+        assert resp.getheader("Content-Encoding") is None
+
+        resp, packed = _call(conn, "GET", "/products?limit=40", headers={"Accept-Encoding": "gzip"})
+        gzip_tag = resp.getheader("ETag")
+        assert resp.getheader("Content-Encoding") == "gzip"
+        assert gzip.decompress(packed) == plain
+        assert gzip_tag != identity_tag
+
+        resp, _ = _call(conn, "GET", "/products?limit=40",
+                        headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_tag})
+        assert resp.status == 304 and resp.getheader("ETag") == gzip_tag
+        # gzip 을 받지 않는 클라이언트에게 gzip 표현의 ETag 로 304 를 주면 안 됨
+        resp, _ = _call(conn, "GET", "/products?limit=40", headers={"If-None-Match": gzip_tag})
+        assert resp.status == 200
+    finally:
+        conn.close()
+        app.shutdown()
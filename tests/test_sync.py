@@ -0,0 +1,77 @@
+from gold_inventory_app import sync
+from gold_inventory_app.db import DataManager
+from gold_inventory_app.models import Product
+
+
+def _stores(tmp_path, *names):
+    return [DataManager(tmp_path / f"{name}.db") for name in names]
+
+
+def _ship(src, dst, path, peer="peer"):
+    """src 에서 peer 로 아직 안 보낸 변경을 내보내 dst 에 적용"""
+    sync.export_delta(src.conn, path, peer=peer)
+    return sync.import_delta(dst.conn, path)
+
+
+def _only(dm):
+    products = list(dm.iter_products())
+    assert len(products) == 1
+    return products[0]
+
+
+def test_concurrent_sale_and_restock_converge(tmp_path):
+    a, b = _stores(tmp_path, "a", "b")
+    a.add_product(Product(name="반지", product_code="C1", stock_qty=3))
+    _ship(a, b, tmp_path / "a1.delta")
+    pa, pb = _only(a), _only(b)
+    assert pb.stock_qty == 3
+
+    a.update_fields(pa.id, {"stock_qty": 2})        # A 에서 판매 1
+    b.update_fields(pb.id, {"stock_qty": 10})       # 동시에 B 에서 7 입고
+    _ship(a, b, tmp_path / "a2.delta")
+    _ship(b, a, tmp_path / "b1.delta")
+    assert _only(a).stock_qty == 9
+    assert _only(b).stock_qty == 9
+
+
+def test_reimporting_a_delta_is_a_noop(tmp_path):
+    a, b = _stores(tmp_path, "a", "b")
+    pid = a.add_product(Product(name="목걸이", product_code="C1", stock_qty=5))
+    a.update_fields(pid, {"stock_qty": 4, "notes": "전시"})
+    path = tmp_path / "a.delta"
+    first = _ship(a, b, path)
+    assert first["inserted"] == 1
+    before = _only(b)
+    changes = b.conn.execute("SELECT COUNT(*) FROM product_changes").fetchone()[0]
+
+    again = sync.import_delta(b.conn, path)
+    assert again["inserted"] == again["updated"] == 0
+    after = _only(b)
+    assert (after.stock_qty, after.notes, after.updated_at) == (before.stock_qty, before.notes, before.updated_at)
+    assert b.conn.execute("SELECT COUNT(*) FROM product_changes").fetchone()[0] == changes
+
+
+def test_delete_wins_over_a_later_update(tmp_path):
+    a, b = _stores(tmp_path, "a", "b")
+    a.add_product(Product(name="귀걸이", product_code="C1", stock_qty=1))
+    _ship(a, b, tmp_path / "a1.delta")
+
+    a.delete_product(_only(a).id)
+    pb = _only(b)
+    b.update_fields(pb.id, {"name": "귀걸이(수정)", "stock_qty": 4})   # 삭제보다 나중
+    result = _ship(a, b, tmp_path / "a2.delta")
+    assert result["deleted"] == 1
+    _ship(b, a, tmp_path / "b1.delta")
+    assert list(a.iter_products()) == []
+    assert list(b.iter_products()) == []
+
+
+def test_product_code_clash_is_counted(tmp_path):
+    a, b = _stores(tmp_path, "a", "b")
+    a.add_product(Product(name="A 매장 반지", product_code="8801", stock_qty=1))
+    b.add_product(Product(name="B 매장 반지", product_code="8801", stock_qty=2))
+
+    result = _ship(a, b, tmp_path / "a.delta")
+    assert result["code_conflicts"] == 1
+    # 로컬 상품이 상품번호를 그대로 가짐
+    assert b.get_by_code("8801").name == "B 매장 반지"
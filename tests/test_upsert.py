@@ -0,0 +1,43 @@
+from gold_inventory_app.db import DataManager
+from gold_inventory_app.models import Product
+
+
+def _seed(tmp_path):
+    dm = DataManager(tmp_path / "upsert.db")
+    dm.add_product(Product(name="a", product_code="C1", stock_qty=1))
+    dm.add_product(Product(name="b", extra_images=["x.jpg"]))
+    dm.add_product(Product(name="c"))
+    return dm
+
+
+def _count(dm):
+    return dm.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+
+def test_reimport_does_not_duplicate_codeless_products(tmp_path):
+    dm = _seed(tmp_path)
+    dump = list(dm.iter_products())
+    for _ in range(2):
+        assert dm.upsert_products(dump) == {"inserted": 0, "updated": 0, "unchanged": 1, "skipped": 2}
+    assert _count(dm) == 3
+    dm.close()
+
+
+def test_match_id_updates_codeless_products(tmp_path):
+    dm = _seed(tmp_path)
+    dump = list(dm.iter_products())
+    for p in dump:
+        p.name += "!"
+    assert dm.upsert_products(dump, match_id=True) == {"inserted": 0, "updated": 3, "unchanged": 0, "skipped": 0}
+    assert dm.upsert_products(dump, match_id=True)["unchanged"] == 3
+    assert sorted(p.name for p in dm.iter_products()) == ["a!", "b!", "c!"]
+    assert _count(dm) == 3
+    dm.close()
+
+
+def test_new_codes_are_inserted(tmp_path):
+    dm = _seed(tmp_path)
+    r = dm.upsert_products([Product(name="d", product_code="C2"), Product(name="a2", product_code="C1")])
+    assert r == {"inserted": 1, "updated": 1, "unchanged": 0, "skipped": 0}
+    assert dm.get_by_code("C1").name == "a2"
+    dm.close()
@@ -0,0 +1,151 @@
+"""
+로컬 API 서버 부하 테스트.
+
+    # 임시 DB + 서버를 직접 띄워서 측정
+    python tools/load_test.py --products 20000 --clients 16 --seconds 10
+
+    # 이미 떠 있는 서버에 대해 측정
+    python tools/load_test.py --url http://127.0.0.1:8765 --clients 16
+
+검색 페이지 / 단건 조회 / If-None-Match 재검증 / 재고 증감을 섞어서 보내고
+요청 종류별 처리량과 지연 시간(p50/p95/p99)을 출력한다.
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gold_inventory_app.db import DataManager          # noqa: E402
+from gold_inventory_app.server import InventoryServer   # noqa: E402
+
+KARATS = ("14K", "18K", "24K")
+CATEGORIES = ("E", "R", "N", "B", "O")
+
+
+def seed(db_path: Path, n: int):
+    dm = DataManager(db_path)
+    rnd = random.Random(42)
+    with dm.conn:
+        dm.conn.executemany(
+            """INSERT INTO products (category,name,supplier_name,karat,weight_g,stock_qty,
+                                     labor_cost1,labor_cost2,discontinued,is_favorite)
+               VALUES (?,?,?,?,?,?,?,?,0,?)""",
+            ((rnd.choice(CATEGORIES), f"상품{i}", f"공장{i % 50}", rnd.choice(KARATS),
+              round(rnd.uniform(0.5, 30), 2), rnd.randint(0, 20),
+              rnd.randint(1, 100) * 1000, 0, int(rnd.random() < 0.05))
+             for i in range(n)),
+        )
+    dm.close()
+
+
+def _request(url, method="GET", body=None, headers=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    if data is not None:
+        req.add_header("Content-Type", "application/json")
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            return resp.status, resp.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, e.headers.get("ETag")
+
+
+def worker(base, max_id, deadline, results, lock, seed_):
+    rnd = random.Random(seed_)
+    etags = {}
+    local = defaultdict(list)
+    errors = 0
+    while time.perf_counter() < deadline:
+        kind = rnd.choices(("search", "get", "revalidate", "stock"), (4, 4, 2, 1))[0]
+        pid = rnd.randint(1, max_id)
+        t0 = time.perf_counter()
+        if kind == "search":
+            status, _ = _request(f"{base}/products?karat={rnd.choice(KARATS)}&limit=100",
+                                 headers={"Accept-Encoding": "gzip"})
+        elif kind == "get":
+            status, etag = _request(f"{base}/products/{pid}")
+            etags[pid] = etag
+        elif kind == "revalidate":
+            pid = rnd.choice(list(etags)) if etags else pid
+            hdr = {"If-None-Match": etags[pid]} if pid in etags else {}
+            status, _ = _request(f"{base}/products/{pid}", headers=hdr)
+        else:
+            status, _ = _request(f"{base}/products/{pid}/stock", "POST",
+                                 {"delta": rnd.choice((-1, 1))})
+        local[kind].append(time.perf_counter() - t0)
+        if status >= 500:
+            errors += 1
+    with lock:
+        for k, v in local.items():
+            results[k].extend(v)
+        results["_errors"].append(errors)
+
+
+def _pct(sorted_vals, p):
+    return sorted_vals[min(len(sorted_vals) - 1, int(len(sorted_vals) * p))] * 1000
+
+
+def run(base, max_id, clients, seconds):
+    results = defaultdict(list)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(base, max_id, deadline, results, lock, i))
+               for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    total = 0
+    print(f"{'kind':<12}{'count':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind in ("search", "get", "revalidate", "stock"):
+        vals = sorted(results.get(kind, []))
+        if not vals:
+            continue
+        total += len(vals)
+        print(f"{kind:<12}{len(vals):>8}{len(vals) / elapsed:>10.1f}"
+              f"{_pct(vals, .50):>10.2f}{_pct(vals, .95):>10.2f}{_pct(vals, .99):>10.2f}")
+    print(f"total {total} requests in {elapsed:.1f}s = {total / elapsed:.1f} req/s, "
+          f"5xx errors: {sum(results['_errors'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="이미 실행 중인 서버 주소 (없으면 임시 서버 실행)")
+    parser.add_argument("--products", type=int, default=20000, help="임시 DB에 넣을 상품 수")
+    parser.add_argument("--max-id", type=int, help="--url 사용 시 조회할 최대 상품 ID")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.url:
+        run(args.url.rstrip("/"), args.max_id or 1000, args.clients, args.seconds)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "load_test.db"
+        seed(db_path, args.products)
+        srv = InventoryServer(db_path, port=0, pool_size=args.pool_size).start()
+        try:
+            print(f"server {srv.url}, {args.products} products, {args.clients} clients")
+            run(srv.url, args.products, args.clients, args.seconds)
+        finally:
+            srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
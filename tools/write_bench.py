@@ -0,0 +1,156 @@
+"""
+상품 쓰기 경로 벤치마크.
+
+    python tools/write_bench.py --products 20000
+
+1) 파라미터 만들기만 (DB 없이): 기준 코드의 손으로 쓴 튜플과 product_params 비교
+2) 임시 DB 에서 건당 시간 (각 호출은 평소처럼 자기 트랜잭션을 커밋하고, 디스크 flush
+   시간에 묻히지 않도록 벤치마크 DB 만 synchronous=OFF 로 연다)
+   - baseline: 기준 코드의 products 테이블과 INSERT / UPDATE 문 그대로 (트리거 없음)
+   - 현재 코드, 트리거 제거: 같은 조건에서 코드 경로만 비교
+   - 현재 코드, 트리거 포함: 동기화 로그, 세트 집계, 재고 변동 트리거가 걸린 실제 DB
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gold_inventory_app.db import DataManager                               # noqa: E402
+from gold_inventory_app.models import Product, product_params  # noqa: E402
+
+KARATS = ("14K", "18K", "24K")
+CATEGORIES = ("E", "R", "N", "B", "O")
+
+
+def make_products(n: int):
+    rnd = random.Random(42)
+    return [Product(category=rnd.choice(CATEGORIES), name=f"상품{i}", supplier_name=f"공장{i % 50}",
+                    supplier_item_no=f"A-{i}", product_code=f"88{i:011d}", karat=rnd.choice(KARATS),
+                    weight_g=round(rnd.uniform(0.5, 30), 2), stock_qty=rnd.randint(0, 20),
+                    labor_cost1=rnd.randint(1, 100) * 1000, set_no=f"S-{i // 4}" if i % 3 == 0 else "")
+            for i in range(n)]
+
+
+# 기준 코드(DataManager._create_table / add_product / update_product)를 그대로 옮긴 것
+BASELINE_TABLE = """
+    CREATE TABLE products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT, name TEXT NOT NULL, supplier_name TEXT, supplier_item_no TEXT,
+        product_code TEXT, karat TEXT, weight_g REAL, size TEXT, total_qb_qty TEXT,
+        labor_cost1 REAL, labor_cost2 REAL, set_no TEXT, discontinued INTEGER DEFAULT 0,
+        stock_qty INTEGER, image_path TEXT, extra_images TEXT, notes TEXT,
+        is_favorite INTEGER DEFAULT 0
+    )"""
+BASELINE_INSERT = """INSERT INTO products
+    (category,name,supplier_name,supplier_item_no,product_code,karat,weight_g,size,total_qb_qty,
+     labor_cost1,labor_cost2,set_no,discontinued,stock_qty,image_path,extra_images,notes,is_favorite)
+     VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)"""
+BASELINE_UPDATE = """UPDATE products SET
+    category=?,name=?,supplier_name=?,supplier_item_no=?,product_code=?,karat=?,weight_g=?,size=?,total_qb_qty=?,
+    labor_cost1=?,labor_cost2=?,set_no=?,discontinued=?,stock_qty=?,image_path=?,extra_images=?,notes=?,is_favorite=?
+    WHERE id=?"""
+
+
+def baseline_params(p: Product) -> tuple:
+    return (p.category, p.name, p.supplier_name, p.supplier_item_no, p.product_code, p.karat,
+            p.weight_g, p.size, p.total_qb_qty, p.labor_cost1, p.labor_cost2, p.set_no,
+            int(p.discontinued), p.stock_qty, p.image_path, json.dumps(p.extra_images or []),
+            p.notes, int(p.is_favorite))
+
+
+def bench_baseline(path: Path, products, ids):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(BASELINE_TABLE)
+
+    def add():
+        for p in products:
+            with conn:
+                ids.append(conn.execute(BASELINE_INSERT, baseline_params(p)).lastrowid)
+
+    def update():
+        for p, pid in zip(products, ids):
+            p.stock_qty += 1
+            with conn:
+                conn.execute(BASELINE_UPDATE, baseline_params(p) + (pid,))
+
+    n = len(products)
+    _time("baseline: add_product", n, add)
+    dt = _time("baseline: update_product", n, update)
+    conn.close()
+    return dt
+
+
+def bench_current(path: Path, products, label: str, drop_triggers: bool):
+    dm = DataManager(path)
+    dm.conn.execute("PRAGMA synchronous=OFF")
+    dm.warm_code_index()                    # GUI 처럼 상품번호 맵을 채운 상태
+    if drop_triggers:
+        with dm.conn:
+            for (name,) in dm.conn.execute("SELECT name FROM sqlite_master WHERE type='trigger'").fetchall():
+                dm.conn.execute(f'DROP TRIGGER "{name}"')
+    rnd = random.Random(7)
+
+    def add():
+        for p in products:
+            p.id = dm.add_product(p)
+
+    def update_full():
+        for p in products:
+            p.stock_qty += 1
+            dm.update_product(p)
+
+    def update_stock():
+        for p in products:
+            p.stock_qty -= 1
+            dm.update_fields(p.id, {"stock_qty": p.stock_qty})
+
+    def upsert():
+        for p in products:
+            p.labor_cost2 = rnd.randint(0, 9) * 1000
+        dm.upsert_products(products)
+
+    n = len(products)
+    _time(f"{label}: add_product", n, add)
+    full = _time(f"{label}: update_product", n, update_full)
+    _time(f"{label}: update_fields(stock)", n, update_stock)
+    _time(f"{label}: upsert_products", n, upsert)
+    dm.close()
+    return full
+
+
+def _time(label: str, n: int, fn):
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<44}{n:>8}{dt * 1e6 / n:>12.2f}{n / dt:>12.0f}")
+    return dt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20000)
+    args = parser.parse_args()
+    n = args.products
+    products = make_products(n)
+
+    print(f"{'':<44}{'count':>8}{'us/op':>12}{'ops/s':>12}")
+    old = _time("params: baseline tuple", n, lambda: [baseline_params(p) for p in products])
+    new = _time("params: product_params", n, lambda: [product_params(p) for p in products])
+    print(f"  -> {old / new:.1f}x")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = bench_baseline(Path(tmp) / "baseline.db", make_products(n), [])
+        bare = bench_current(Path(tmp) / "bare.db", make_products(n), "current, no triggers", True)
+        full = bench_current(Path(tmp) / "full.db", make_products(n), "current, triggers", False)
+    print(f"  -> update_product vs baseline: {bare / base:.2f}x without triggers, "
+          f"{full / base:.2f}x with triggers")
+
+if __name__ == "__main__":
+    main()